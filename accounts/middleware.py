@@ -0,0 +1,33 @@
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """
+    Authenticates websocket connections with the same access tokens as the
+    API. Browsers can't set headers on a websocket handshake, so the token
+    comes in the query string: ``/ws/prices/?token=<access token>``.
+    """
+
+    async def __call__(self, scope, receive, send):
+        query = parse_qs(scope.get("query_string", b"").decode())
+        token = query.get("token", [None])[0]
+        scope = dict(scope, user=await get_user_for_token(token))
+        return await super().__call__(scope, receive, send)
+
+
+@database_sync_to_async
+def get_user_for_token(raw_token):
+    if not raw_token:
+        return AnonymousUser()
+    auth = JWTAuthentication()
+    try:
+        return auth.get_user(auth.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        return AnonymousUser()
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.3 on 2026-10-18 10:08
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_referral_counts(apps, schema_editor):
+    User = apps.get_model("accounts", "User")
+    User.objects.update(
+        referral_count=Coalesce(
+            Subquery(
+                User.objects.filter(referred_by=OuterRef("pk"))
+                .values("referred_by")
+                .annotate(n=Count("pk"))
+                .values("n")
+            ),
+            0,
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='referral_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_referral_counts, migrations.RunPython.noop),
+    ]
@@ -32,6 +32,9 @@ class User(AbstractBaseUser, PermissionsMixin):
         blank=True,
         related_name="referrals",
     )
+    # Denormalized count of ``referrals``; kept in step with F() updates and
+    # repaired by reconcile_referral_counts()
+    referral_count = models.PositiveIntegerField(default=0)
     date_joined = models.DateTimeField(auto_now_add=True)
     last_login = models.DateTimeField(auto_now=True)
 
@@ -44,10 +47,6 @@ class User(AbstractBaseUser, PermissionsMixin):
     def __str__(self) -> str:
         return self.email
 
-    @property
-    def referral_count(self):
-        return self.referrals.count()
-
     @property
     def get_full_name(self):
         return f"{self.first_name} {self.last_name}"
@@ -1,4 +1,7 @@
 from rest_framework import serializers
+from django.db import transaction
+from django.db.models import F
+from trades.utils import clear_user_dashboard_cache
 from .models import User, PasswordResetToken
 from django.contrib.auth import authenticate
 from rest_framework.exceptions import AuthenticationFailed
@@ -52,11 +55,16 @@ class UserRegisterSerializer(serializers.ModelSerializer):
             except User.DoesNotExist:
                 raise serializers.ValidationError("Invalid referral code.")
 
-        user = User.objects.create_user(**validated_data)
+        with transaction.atomic():
+            user = User.objects.create_user(**validated_data)
 
-        if referred_by:
-            user.referred_by = referred_by
-            user.save()
+            if referred_by:
+                user.referred_by = referred_by
+                user.save()
+                User.objects.filter(pk=referred_by.pk).update(
+                    referral_count=F("referral_count") + 1
+                )
+                clear_user_dashboard_cache(referred_by.pk)
 
         return user
 
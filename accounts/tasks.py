@@ -1,7 +1,7 @@
 from celery import shared_task
 from .models import User
 import pyotp
-from .utils import send_activation_email, send_password_reset_email, send_otp_reset_email
+from .utils import send_activation_email, send_password_reset_email, send_otp_reset_email, reconcile_referral_counts
 
 @shared_task
 def send_activation_email_task(user_id, otp_secret):
@@ -20,3 +20,8 @@ def send_otp_reset_email_task(user_id, otp_secret):
     user = User.objects.get(id=user_id)
     otp_code = pyotp.TOTP(otp_secret, interval=600).now()
     send_otp_reset_email(user=user, otp_code=otp_code)
+
+@shared_task
+def reconcile_referral_counts_task():
+    fixed = reconcile_referral_counts()
+    print(f"Reconciled referral counters, fixed {fixed} user(s)")
@@ -2,6 +2,8 @@ import random
 import string
 from django.conf import settings
 from django.core.mail import send_mail
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 
 
 def generate_referral_code():
@@ -38,3 +40,32 @@ def send_password_reset_email(user, otp_code):
     from_email = settings.DEFAULT_FROM_EMAIL
     recipient_list = [user.email]
     send_mail(subject, message, from_email, recipient_list)
+
+
+def reconcile_referral_counts():
+    """
+    Repairs drifted referral counters with one set-based UPDATE and returns
+    how many users were fixed.
+    """
+    from .models import User
+
+    actual = Coalesce(
+        Subquery(
+            User.objects.filter(referred_by=OuterRef("pk"))
+            .values("referred_by")
+            .annotate(n=Count("pk"))
+            .values("n")
+        ),
+        0,
+    )
+    from trades.utils import clear_user_dashboard_cache
+
+    drifted = list(
+        User.objects.annotate(actual=actual)
+        .exclude(referral_count=F("actual"))
+        .values_list("pk", flat=True)
+    )
+    User.objects.filter(pk__in=drifted).update(referral_count=actual)
+    for user_id in drifted:
+        clear_user_dashboard_cache(user_id)
+    return len(drifted)
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 from datetime import timedelta
+from decimal import Decimal
 import dj_database_url
 
 from decouple import config
@@ -90,6 +91,7 @@ INSTALLED_APPS = [
     "django_filters",
     "cloudinary_storage",
     "cloudinary",
+    "channels",
 ]
 
 MIDDLEWARE = [
@@ -271,10 +273,61 @@ else:
     }
 
 
+# Price source for update_asset_prices: twelvedata, finnhub or replay
+PRICE_PROVIDER = os.getenv("PRICE_PROVIDER", "twelvedata")
+
 FINNHUB_API_KEY = os.getenv("FINNHUB_API_KEY")
+# Calls per minute on our Finnhub plan (one call per quoted symbol)
+FINNHUB_CALLS_PER_MINUTE = int(os.getenv("FINNHUB_CALLS_PER_MINUTE", 60))
 
 
 TWELVE_DATA_API_KEY = os.getenv("TWELVE_DATA_API_KEY")
+# Credits per minute on our TwelveData plan (one credit per quoted symbol)
+TWELVE_DATA_CREDITS_PER_MINUTE = int(os.getenv("TWELVE_DATA_CREDITS_PER_MINUTE", 8))
+
+# Relative price move below which a refresh writes nothing for a symbol
+# (0.0001 = 0.01%); 0 skips only exact repeats.
+PRICE_CHANGE_TOLERANCE = Decimal(os.getenv("PRICE_CHANGE_TOLERANCE", "0"))
+
+# Adaptive refresh scheduling (trades/scheduling.py): base cadence per
+# asset_type in seconds, slowed for symbols without open trades, halved for
+# symbols with many, and stretched while the market is closed.
+PRICE_REFRESH_RUN_SECONDS = 60  # how often beat runs the scheduler
+PRICE_REFRESH_SECONDS = {
+    "crypto": int(os.getenv("PRICE_REFRESH_CRYPTO_SECONDS", 60)),
+    "forex": int(os.getenv("PRICE_REFRESH_FOREX_SECONDS", 120)),
+    "stock": int(os.getenv("PRICE_REFRESH_STOCK_SECONDS", 120)),
+    "default": 300,
+}
+PRICE_REFRESH_IDLE_FACTOR = int(os.getenv("PRICE_REFRESH_IDLE_FACTOR", 5))
+PRICE_REFRESH_HOT_TRADES = int(os.getenv("PRICE_REFRESH_HOT_TRADES", 50))
+PRICE_REFRESH_MIN_SECONDS = 30
+PRICE_REFRESH_CLOSED_MARKET_SECONDS = int(os.getenv("PRICE_REFRESH_CLOSED_MARKET_SECONDS", 6 * 60 * 60))
+# Exchange holidays (ISO dates) on which stock markets stay closed
+MARKET_HOLIDAYS = [d for d in os.getenv("MARKET_HOLIDAYS", "").split(",") if d]
+
+# Websocket price pushes (copiqat/asgi.py). Redis pub/sub fans updates out
+# across ASGI workers; CHANNEL_LAYER_BACKEND=memory keeps everything in one
+# process for tests and local development.
+ASGI_APPLICATION = "copiqat.asgi.application"
+if os.getenv("CHANNEL_LAYER_BACKEND") == "memory":
+    CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+else:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.pubsub.RedisPubSubChannelLayer",
+            "CONFIG": {"hosts": [os.getenv("REDIS_URL", "redis://localhost:6379/1")]},
+        }
+    }
+
+# Price history retention: raw ticks and fine candles are pruned once rolled
+# up and older than this; daily candles are kept forever.
+PRICE_TICK_RETENTION_HOURS = int(os.getenv("PRICE_TICK_RETENTION_HOURS", 48))
+PRICE_MINUTE_CANDLE_RETENTION_DAYS = int(os.getenv("PRICE_MINUTE_CANDLE_RETENTION_DAYS", 7))
+PRICE_HOUR_CANDLE_RETENTION_DAYS = int(os.getenv("PRICE_HOUR_CANDLE_RETENTION_DAYS", 180))
+
+# How often vault today/daily/weekly/monthly P&L and earnings are rolled up
+VAULT_PL_REFRESH_SECONDS = int(os.getenv("VAULT_PL_REFRESH_SECONDS", 5 * 60))
 
 CACHES = {
     "default": {
@@ -299,9 +352,38 @@ CELERY_TIMEZONE = "UTC"
 CELERY_BEAT_SCHEDULER = "celery.beat:PersistentScheduler"
 CELERY_BEAT_SCHEDULE_FILENAME = "celerybeat-schedule"
 CELERY_BEAT_SCHEDULE = {
-    "run-update-prices-every-2-minuites": {
+    "run-update-prices-every-minute": {
         "task": "trades.tasks.update_prices_task",  # Path to the new task
-        "schedule": 110,  # Run every 12 seconds (5 times per minute)
+        # the scheduler decides which symbols are due on each run
+        "schedule": PRICE_REFRESH_RUN_SECONDS,
+    },
+    "expire-trades-every-minute": {
+        "task": "trades.tasks.expire_trades_task",
+        "schedule": 60,
+    },
+    "rollup-price-candles-every-minute": {
+        "task": "trades.tasks.rollup_candles_task",
+        "schedule": 60,
+    },
+    "refresh-vault-pl": {
+        "task": "trades.tasks.refresh_vault_pl_task",
+        "schedule": VAULT_PL_REFRESH_SECONDS,
+    },
+    "checkpoint-vault-balances-hourly": {
+        "task": "trades.tasks.checkpoint_balances_task",
+        "schedule": 60 * 60,
+    },
+    "prune-price-history-hourly": {
+        "task": "trades.tasks.prune_price_history_task",
+        "schedule": 60 * 60,
+    },
+    "reconcile-open-trade-counters-hourly": {
+        "task": "trades.tasks.reconcile_counters_task",
+        "schedule": 60 * 60,
+    },
+    "reconcile-referral-counters-hourly": {
+        "task": "accounts.tasks.reconcile_referral_counts_task",
+        "schedule": 60 * 60,
     },
 }
 
@@ -316,4 +398,8 @@ LOGGING = {
         "handlers": ["console"],
         "level": "INFO",
     },
+    "loggers": {
+        # httpx logs every request URL at INFO, API keys included
+        "httpx": {"level": "WARNING"},
+    },
 }
@@ -1,6 +1,7 @@
 from django.contrib import admin
 from unfold.admin import ModelAdmin
-from .models import BuyAndSell, Vault, Deposit, Asset, Trader
+from .models import BuyAndSell, Vault, Deposit, Asset, Trader, LedgerEntry
+from .ledger import adjust_balance, approve_deposits
 from django.utils.html import format_html
 
 
@@ -8,8 +9,9 @@ from django.utils.html import format_html
 class BuyAndSellAdmin(ModelAdmin):
     list_display = ("user", "asset", "trade_type", "trade_status", "entry_price", "pl", "duration")
     list_filter = ("trade_type", "trade_status", "created_at")
-    search_fields = ("user__username", "asset")
+    search_fields = ("user__username", "asset__symbol")
     ordering = ("-created_at",)
+    list_select_related = ("user", "asset")
 
     fieldsets = (
         ("Trade Information", {
@@ -31,26 +33,29 @@ class VaultAdmin(ModelAdmin):
 
     fieldsets = (
         ("User Vault Info", {
-            "fields": ("user", "balance", "daily_pl", "weekly_pl", "monthly_pl", "earning")
+            "fields": ("user", "balance", "today", "daily_pl", "weekly_pl", "monthly_pl", "earning")
         }),
         ("Timestamps", {
             "fields": ("updated_at",),
             "classes": ("collapse",)
         }),
     )
-    readonly_fields = ("updated_at",)
+    # rolled up from realized/unrealized trade P&L by refresh_vault_pl; the
+    # balance only moves through ledger entries
+    readonly_fields = ("updated_at", "balance", "daily_pl", "weekly_pl", "monthly_pl", "earning", "today")
 
 
 @admin.register(Deposit)
 class DepositAdmin(ModelAdmin):
-    list_display = ("user", "receipt_preview", "is_approved", "created_at")
+    list_display = ("user", "amount", "receipt_preview", "is_approved", "created_at")
     list_filter = ("is_approved", "created_at")
     search_fields = ("user__username",)
     ordering = ("-created_at",)
+    actions = ["approve_selected"]
 
     fieldsets = (
         (None, {
-            "fields": ("user", "receipt", "receipt_preview", "is_approved")
+            "fields": ("user", "amount", "receipt", "receipt_preview", "is_approved")
         }),
         ("Meta", {
             "fields": ("created_at",),
@@ -59,6 +64,26 @@ class DepositAdmin(ModelAdmin):
     )
     readonly_fields = ("receipt_preview", "created_at")
 
+    def get_readonly_fields(self, request, obj=None):
+        # approved deposits are on the ledger; corrections are adjustments
+        if obj and obj.is_approved:
+            return self.readonly_fields + ("user", "amount", "is_approved")
+        return self.readonly_fields
+
+    def save_model(self, request, obj, form, change):
+        approving = obj.is_approved and "is_approved" in form.changed_data
+        if approving:
+            obj.is_approved = False  # approve_deposits flips it and credits the vault
+        super().save_model(request, obj, form, change)
+        if approving:
+            approve_deposits(Deposit.objects.filter(pk=obj.pk))
+            obj.is_approved = True
+
+    @admin.action(description="Approve selected deposits")
+    def approve_selected(self, request, queryset):
+        approved = approve_deposits(queryset)
+        self.message_user(request, f"Approved {approved} deposit(s).")
+
     def receipt_preview(self, obj):
         if obj.receipt:
             return format_html('<img src="{}" style="max-height: 200px;"/>', obj.receipt.url)
@@ -66,6 +91,28 @@ class DepositAdmin(ModelAdmin):
     receipt_preview.short_description = "Receipt Preview"
 
 
+@admin.register(LedgerEntry)
+class LedgerEntryAdmin(ModelAdmin):
+    """Append-only: staff can add manual adjustments, nothing can be edited."""
+
+    list_display = ("user", "kind", "amount", "trade", "deposit", "note", "created_at")
+    list_filter = ("kind", "created_at")
+    search_fields = ("user__email", "note")
+    ordering = ("-id",)
+    list_select_related = ("user",)
+    raw_id_fields = ("user",)
+    fields = ("user", "amount", "note")
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def save_model(self, request, obj, form, change):
+        entry = adjust_balance(obj.user_id, obj.amount, obj.note)
+        obj.pk = entry.pk
+
 
 @admin.register(Asset)
 class AssetAdmin(ModelAdmin):
@@ -0,0 +1,79 @@
+"""
+Synthetic data for the PostgreSQL benchmark commands.
+
+Users and assets are bulk-created; trades are seeded with a single
+INSERT ... SELECT over generate_series, which keeps millions of rows fast.
+Each benchmark only says how its interesting columns vary with the row
+number ``g``; every other BuyAndSell column gets its model default, so
+new columns need no change here.
+"""
+
+import re
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+
+from .models import Asset, BuyAndSell
+
+User = get_user_model()
+
+EXECUTION_TIME = re.compile(r"Execution Time: ([\d.]+) ms")
+
+
+def seed_users_and_assets(users, assets, symbol_prefix, price=100):
+    """
+    Bulk-creates ``users`` users and ``assets`` crypto assets at ``price``,
+    named uniquely per run. Returns ``(user_ids, symbols)``, with user ids
+    as strings ready for a ``uuid[]`` parameter.
+    """
+    run = uuid.uuid4().hex[:8]
+    user_objs = [
+        User(email=f"bench-{run}-{i}@bench.invalid", first_name="Bench", last_name="User")
+        for i in range(users)
+    ]
+    User.objects.bulk_create(user_objs, batch_size=5_000)
+    symbols = [f"{symbol_prefix}{run[:4]}{i}" for i in range(assets)]
+    Asset.objects.bulk_create(
+        [Asset(symbol=s, name=s, asset_type="crypto", current_price=price) for s in symbols]
+    )
+    return [str(u.id) for u in user_objs], symbols
+
+
+def seed_trades(rows, synthetic):
+    """
+    Inserts ``rows`` trades in one statement. ``synthetic`` maps a column
+    to ``(sql expression of g, params)``; ``%`` in the SQL is written ``%%``.
+    Deferred FK checks are run and the table analyzed before returning, so
+    index builds and timings that follow see a settled table.
+    """
+    columns, exprs, params = [], [], []
+    for field in BuyAndSell._meta.concrete_fields:
+        if field.primary_key:
+            continue
+        columns.append(connection.ops.quote_name(field.column))
+        if field.column in synthetic:
+            expr, expr_params = synthetic[field.column]
+        else:
+            default = field.get_db_prep_save(field.get_default(), connection)
+            expr, expr_params = "%s", [default]
+        exprs.append(expr)
+        params.extend(expr_params)
+
+    table = connection.ops.quote_name(BuyAndSell._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} ({', '.join(columns)}) "
+            f"SELECT {', '.join(exprs)} FROM generate_series(1, %s) AS g",
+            params + [rows],
+        )
+        # run the deferred FK checks now: CREATE INDEX refuses to run with
+        # them pending, and they'd otherwise land inside the timings
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        cursor.execute(f"ANALYZE {table}")
+
+
+def execution_ms(plan):
+    """Execution time from EXPLAIN ANALYZE output, NaN if it has none."""
+    match = EXECUTION_TIME.search(plan)
+    return float(match.group(1)) if match else float("nan")
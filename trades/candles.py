@@ -0,0 +1,250 @@
+"""
+Price history rollups, retention and range reads.
+
+Ticks roll up into 1m candles, 1m into 1h and 1h into 1d. Each rollup is
+incremental and tracked per asset: it restarts one bucket before the
+asset's newest candle of its resolution and upserts. Re-rolling the last
+closed bucket picks up ticks that were committed late, and a busy symbol
+never moves the starting point of a quiet one. Rollups can run as often as
+we like. Sources are streamed in (asset, time) order and folded in one pass.
+"""
+
+import re
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from .models import PriceCandle, PriceTick
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+RESOLUTIONS = {
+    PriceCandle.MINUTE: timedelta(minutes=1),
+    PriceCandle.HOUR: timedelta(hours=1),
+    PriceCandle.DAY: timedelta(days=1),
+}
+
+# resolution -> the finer resolution it is rolled up from (None = raw ticks)
+ROLLUP_SOURCES = {
+    PriceCandle.MINUTE: None,
+    PriceCandle.HOUR: PriceCandle.MINUTE,
+    PriceCandle.DAY: PriceCandle.HOUR,
+}
+
+CANDLE_FIELDS = ("open", "high", "low", "close", "tick_count")
+
+STREAM_CHUNK_SIZE = 5000
+UPSERT_BATCH_SIZE = 1000
+
+INTERVAL_RE = re.compile(r"^(\d+)([mhd])$")
+INTERVAL_UNITS = {"m": "minutes", "h": "hours", "d": "days"}
+
+
+def floor_time(at, step):
+    """Start of the ``step``-wide bucket holding ``at``, aligned to the epoch (UTC)."""
+    return at - (at - EPOCH) % step
+
+
+def parse_interval(value):
+    """'15m' / '4h' / '1d' -> timedelta, or None if it isn't one."""
+    match = INTERVAL_RE.match(value or "")
+    if not match or int(match.group(1)) == 0:
+        return None
+    try:
+        return timedelta(**{INTERVAL_UNITS[match.group(2)]: int(match.group(1))})
+    except OverflowError:  # more than timedelta can hold
+        return None
+
+
+def fold_ohlc(rows, step):
+    """
+    Folds ``(asset, at, open, high, low, close, count)`` rows, sorted by
+    asset then time, into one candle tuple of the same shape per bucket.
+    """
+    candle = None
+    for asset, at, open_, high, low, close, count in rows:
+        bucket = floor_time(at, step)
+        if candle is not None and candle[0] == asset and candle[1] == bucket:
+            candle[3] = max(candle[3], high)
+            candle[4] = min(candle[4], low)
+            candle[5] = close
+            candle[6] += count
+            continue
+        if candle is not None:
+            yield tuple(candle)
+        candle = [asset, bucket, open_, high, low, close, count]
+    if candle is not None:
+        yield tuple(candle)
+
+
+def _rollup_starts(resolution):
+    """
+    {asset: where its next ``resolution`` rollup starts}: one bucket before
+    its newest candle, so the last closed bucket is rebuilt along with the
+    current one. Assets without candles yet aren't in it.
+    """
+    step = RESOLUTIONS[resolution]
+    newest = (
+        PriceCandle.objects.filter(resolution=resolution)
+        .order_by()
+        .values("asset")
+        .annotate(latest=Max("bucket_start"))
+        .values_list("asset", "latest")
+    )
+    return {asset: latest - step for asset, latest in newest}
+
+
+def _since_filter(time_field, starts):
+    """
+    Source rows at or after their asset's start, plus every row of assets
+    not rolled up yet. Assets sharing a start share one branch, so the OR
+    stays short when most of them were rolled up by the same run.
+    """
+    by_start = defaultdict(list)
+    for asset, start in starts.items():
+        by_start[start].append(asset)
+    condition = ~Q(asset_id__in=list(starts))
+    for start, assets in by_start.items():
+        condition |= Q(asset_id__in=assets, **{f"{time_field}__gte": start})
+    return condition
+
+
+def _source_rows(resolution, starts):
+    source = ROLLUP_SOURCES[resolution]
+    if source is None:
+        rows = PriceTick.objects.order_by("asset", "recorded_at")
+        if starts:
+            rows = rows.filter(_since_filter("recorded_at", starts))
+        # a tick is a candle with open = high = low = close
+        return (
+            (asset, at, price, price, price, price, 1)
+            for asset, at, price in rows.values_list(
+                "asset_id", "recorded_at", "price"
+            ).iterator(chunk_size=STREAM_CHUNK_SIZE)
+        )
+
+    rows = PriceCandle.objects.filter(resolution=source).order_by("asset", "bucket_start")
+    if starts:
+        rows = rows.filter(_since_filter("bucket_start", starts))
+    return rows.values_list("asset_id", "bucket_start", *CANDLE_FIELDS).iterator(
+        chunk_size=STREAM_CHUNK_SIZE
+    )
+
+
+def _upsert(resolution, candles):
+    PriceCandle.objects.bulk_create(
+        [
+            PriceCandle(
+                asset_id=asset,
+                resolution=resolution,
+                bucket_start=bucket,
+                open=open_,
+                high=high,
+                low=low,
+                close=close,
+                tick_count=count,
+            )
+            for asset, bucket, open_, high, low, close, count in candles
+        ],
+        update_conflicts=True,
+        unique_fields=["asset", "resolution", "bucket_start"],
+        update_fields=list(CANDLE_FIELDS),
+    )
+
+
+def rollup(resolution):
+    """
+    Rebuilds each asset's ``resolution`` candles from the bucket before its
+    newest one onwards. Returns the number of candles written.
+    """
+    starts = _rollup_starts(resolution)
+
+    written = 0
+    batch = []
+    with transaction.atomic():
+        for candle in fold_ohlc(_source_rows(resolution, starts), RESOLUTIONS[resolution]):
+            batch.append(candle)
+            if len(batch) >= UPSERT_BATCH_SIZE:
+                _upsert(resolution, batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            _upsert(resolution, batch)
+            written += len(batch)
+    return written
+
+
+def rollup_all():
+    """Runs every rollup, finest first. Returns {resolution: candles written}."""
+    return {resolution: rollup(resolution) for resolution in RESOLUTIONS}
+
+
+def prune_price_history(now=None):
+    """
+    Deletes raw ticks and 1m/1h candles past their retention window, but
+    never anything the next coarser rollup still reads (from one bucket
+    before the newest coarser candle), so nothing is dropped before it has
+    been rolled up. Daily candles are kept.
+    Returns {"ticks": n, "1m": n, "1h": n} deleted.
+    """
+    now = now or timezone.now()
+    retention = {
+        "ticks": timedelta(hours=settings.PRICE_TICK_RETENTION_HOURS),
+        PriceCandle.MINUTE: timedelta(days=settings.PRICE_MINUTE_CANDLE_RETENTION_DAYS),
+        PriceCandle.HOUR: timedelta(days=settings.PRICE_HOUR_CANDLE_RETENTION_DAYS),
+    }
+    rolled_into = {
+        "ticks": PriceCandle.MINUTE,
+        PriceCandle.MINUTE: PriceCandle.HOUR,
+        PriceCandle.HOUR: PriceCandle.DAY,
+    }
+
+    deleted = {}
+    for kind, keep in retention.items():
+        rolled_up_to = PriceCandle.objects.filter(resolution=rolled_into[kind]).aggregate(
+            latest=Max("bucket_start")
+        )["latest"]
+        if rolled_up_to is None:
+            deleted[kind] = 0
+            continue
+        cutoff = min(now - keep, rolled_up_to - RESOLUTIONS[rolled_into[kind]])
+        if kind == "ticks":
+            rows = PriceTick.objects.filter(recorded_at__lt=cutoff)
+        else:
+            rows = PriceCandle.objects.filter(resolution=kind, bucket_start__lt=cutoff)
+        deleted[kind] = rows.delete()[0]
+    return deleted
+
+
+def pick_resolution(interval):
+    """Coarsest stored resolution whose buckets tile ``interval`` exactly."""
+    for resolution in reversed(RESOLUTIONS):
+        if interval % RESOLUTIONS[resolution] == timedelta(0):
+            return resolution
+    return None
+
+
+def get_candles(symbol, start, end, interval):
+    """
+    Candles for ``symbol`` in ``[start, end)`` at ``interval``, read from the
+    coarsest stored resolution that tiles it with one indexed range scan,
+    and folded further in Python when the interval is a multiple of it.
+    """
+    resolution = pick_resolution(interval)
+    rows = (
+        PriceCandle.objects.filter(
+            asset_id=symbol,
+            resolution=resolution,
+            bucket_start__gte=floor_time(start, interval),
+            bucket_start__lt=end,
+        )
+        .order_by("bucket_start")
+        .values_list("asset_id", "bucket_start", *CANDLE_FIELDS)
+    )
+    if interval == RESOLUTIONS[resolution]:
+        return resolution, list(rows)
+    return resolution, list(fold_ohlc(rows.iterator(chunk_size=STREAM_CHUNK_SIZE), interval))
@@ -0,0 +1,113 @@
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from .models import BuyAndSell
+from .pnl import value_trades
+from .prices import get_price_snapshot
+from .realtime import price_group, user_group
+
+
+class PriceConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Pushes live prices and P&L for the symbols the user holds.
+
+    On connect the socket gets a ``snapshot`` of every open trade, then one
+    ``price`` message per tick of a held symbol, carrying the re-valued
+    trades in that symbol. Opening or closing a trade re-subscribes the
+    socket, so clients never need to poll.
+    """
+
+    async def connect(self):
+        user = self.scope.get("user")
+        if user is None or not user.is_authenticated:
+            await self.close(code=4401)
+            return
+
+        self.user_id = user.id
+        self.symbols = set()
+        self.positions = {}
+        await self.channel_layer.group_add(user_group(self.user_id), self.channel_name)
+        await self.accept()
+        await self.refresh_holdings()
+
+    async def disconnect(self, code):
+        if not hasattr(self, "user_id"):
+            return
+        await self.channel_layer.group_discard(user_group(self.user_id), self.channel_name)
+        for symbol in self.symbols:
+            await self.channel_layer.group_discard(price_group(symbol), self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        # push-only socket; a ping gets a pong so clients can keep it alive
+        if content.get("type") == "ping":
+            await self.send_json({"type": "pong"})
+
+    async def refresh_holdings(self):
+        positions, prices = await self.load_holdings()
+        symbols = set(positions)
+
+        for symbol in self.symbols - symbols:
+            await self.channel_layer.group_discard(price_group(symbol), self.channel_name)
+        for symbol in symbols - self.symbols:
+            await self.channel_layer.group_add(price_group(symbol), self.channel_name)
+        self.symbols, self.positions = symbols, positions
+
+        await self.send_json(
+            {
+                "type": "snapshot",
+                "prices": {symbol: str(price) for symbol, price in prices.items()},
+                "trades": [
+                    trade
+                    for symbol in positions
+                    for trade in self.value(symbol, prices.get(symbol))
+                ],
+            }
+        )
+
+    @database_sync_to_async
+    def load_holdings(self):
+        positions = {}
+        open_trades = BuyAndSell.objects.filter(
+            user_id=self.user_id, trade_status=BuyAndSell.OPEN
+        ).values_list("id", "asset_id", "trade_type", "entry_price")
+        for trade_id, symbol, side, entry_price in open_trades:
+            positions.setdefault(symbol, []).append((trade_id, side, entry_price))
+        return positions, get_price_snapshot(positions)
+
+    def value(self, symbol, price):
+        trades = self.positions.get(symbol, [])
+        if not trades:
+            return []
+        current = [entry if price is None else price for _, _, entry in trades]
+        valuation = value_trades(
+            [entry for _, _, entry in trades], [side for _, side, _ in trades], current
+        )
+        return [
+            {
+                "id": trade_id,
+                "asset": symbol,
+                "current_price": str(current[i]),
+                "pl": valuation.pl(i),
+                "pl_percent": valuation.pl_percent(i),
+            }
+            for i, (trade_id, _, _) in enumerate(trades)
+        ]
+
+    # channel layer handlers
+
+    async def price_update(self, event):
+        symbol = event["symbol"]
+        if symbol not in self.positions:
+            return  # stale subscription, unsubscribed on the next refresh
+        await self.send_json(
+            {
+                "type": "price",
+                "symbol": symbol,
+                "price": event["price"],
+                "version": event.get("version"),
+                "trades": self.value(symbol, event["price"]),
+            }
+        )
+
+    async def holdings_changed(self, event):
+        await self.refresh_holdings()
@@ -0,0 +1,73 @@
+"""
+Duration-based trade expiry.
+
+``BuyAndSell.duration`` ("30m", "4h", "2 days", ...) is parsed into an
+indexed ``expires_at`` when a trade is opened. A beat task then closes
+everything due in batches: one indexed range read, one snapshot lookup and
+one settling UPDATE per batch, instead of a timer per trade.
+"""
+
+import re
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import BuyAndSell
+from .prices import get_price_snapshot
+from .settlement import settle_trades
+
+DURATION_RE = re.compile(r"^\s*(\d+)\s*([a-z]+)\s*$", re.IGNORECASE)
+DURATION_UNITS = {
+    "seconds": ("s", "sec", "secs", "second", "seconds"),
+    "minutes": ("m", "min", "mins", "minute", "minutes"),
+    "hours": ("h", "hr", "hrs", "hour", "hours"),
+    "days": ("d", "day", "days"),
+    "weeks": ("w", "wk", "wks", "week", "weeks"),
+}
+UNIT_ALIASES = {alias: unit for unit, aliases in DURATION_UNITS.items() for alias in aliases}
+# longest a trade may run; also keeps created_at + duration a valid datetime
+MAX_DURATION = timedelta(days=365)
+
+EXPIRY_BATCH_SIZE = 1000
+
+
+def parse_duration(value):
+    """
+    '30m' / '4h' / '2 days' -> timedelta, or None if it isn't one or is
+    longer than MAX_DURATION.
+    """
+    match = DURATION_RE.match(value or "")
+    if not match:
+        return None
+    unit = UNIT_ALIASES.get(match.group(2).lower())
+    amount = int(match.group(1))
+    if unit is None or amount == 0:
+        return None
+    try:
+        duration = timedelta(**{unit: amount})
+    except OverflowError:
+        return None
+    return duration if duration <= MAX_DURATION else None
+
+
+def expire_due_trades(now=None, batch_size=EXPIRY_BATCH_SIZE):
+    """
+    Closes every open trade whose ``expires_at`` has passed, at the live
+    snapshot price, and returns how many were closed. Trades in a symbol
+    with no price at all are left open for a later run.
+    """
+    now = now or timezone.now()
+    due = BuyAndSell.objects.filter(
+        trade_status=BuyAndSell.OPEN, expires_at__lte=now
+    ).order_by("expires_at")
+
+    closed = 0
+    unpriced = set()
+    while batch := list(
+        due.exclude(asset_id__in=unpriced).values_list("id", "asset_id")[:batch_size]
+    ):
+        prices = get_price_snapshot({symbol for _, symbol in batch})
+        unpriced |= {symbol for _, symbol in batch} - prices.keys()
+        trades = BuyAndSell.objects.filter(id__in=[pk for pk, _ in batch])
+        closed += len(settle_trades(trades, prices, BuyAndSell.EXPIRED, now=now))
+    return closed
@@ -0,0 +1,214 @@
+"""
+Streaming trade history exports (CSV, Arrow IPC and Parquet).
+
+Rows are read as plain tuples off a server-side cursor and valued a chunk
+at a time, so an export never builds model instances or holds more than one
+chunk in memory. Writers yield ``bytes`` and can feed either a
+``StreamingHttpResponse`` or a file.
+"""
+
+import csv
+from itertools import islice
+
+from .models import BuyAndSell
+from .pnl import value_trades
+from .prices import get_price_snapshot
+
+DEFAULT_CHUNK_SIZE = 5000
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrow"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+EXPORT_FIELDS = (
+    "id",
+    "user_id",
+    "user__email",
+    "asset",
+    "trade_type",
+    "trade_status",
+    "entry_price",
+    "take_profit",
+    "stop_loss",
+    "duration",
+    "pl",
+    "created_at",
+)
+
+EXPORT_COLUMNS = (
+    "id",
+    "user_id",
+    "user_email",
+    "asset",
+    "trade_type",
+    "trade_status",
+    "entry_price",
+    "current_price",
+    "take_profit",
+    "stop_loss",
+    "duration",
+    "realized_pl",
+    "unrealized_pl",
+    "unrealized_pl_percent",
+    "created_at",
+)
+
+
+def export_queryset(user=None):
+    """Trades to export: one user's, or everyone's when ``user`` is None."""
+    trades = BuyAndSell.objects.all()
+    if user is not None:
+        trades = trades.filter(user=user)
+    return trades.order_by("-created_at", "-id").values_list(*EXPORT_FIELDS)
+
+
+def iter_export_rows(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yields lists of export rows (tuples in EXPORT_COLUMNS order), one list
+    per chunk. Closed trades report their stored realized P&L, open trades
+    their live unrealized P&L.
+    """
+    rows = queryset.iterator(chunk_size=chunk_size)
+    prices = {}
+    while chunk := list(islice(rows, chunk_size)):
+        missing = {row[3] for row in chunk} - prices.keys()
+        if missing:
+            prices.update(get_price_snapshot(missing))
+
+        current = [prices.get(row[3], row[6]) for row in chunk]
+        valuation = value_trades(
+            [row[6] for row in chunk], [row[4] for row in chunk], current
+        )
+
+        out = []
+        for i, row in enumerate(chunk):
+            (pk, user_id, email, asset, side, status) = row[:6]
+            (entry, tp, sl, duration, pl, created_at) = row[6:]
+            is_open = status == BuyAndSell.OPEN
+            out.append(
+                (
+                    pk,
+                    str(user_id),
+                    email,
+                    asset,
+                    side,
+                    status,
+                    str(entry),
+                    str(current[i]) if is_open else None,
+                    str(tp),
+                    str(sl),
+                    duration,
+                    None if is_open else str(pl),
+                    valuation.pl(i) if is_open else None,
+                    valuation.pl_percent(i) if is_open else None,
+                    created_at,
+                )
+            )
+        yield out
+
+
+class _Echo:
+    """Pseudo-buffer for csv.writer: ``write`` just returns the line."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(chunks):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_COLUMNS).encode()
+    for chunk in chunks:
+        yield "".join(
+            writer.writerow(row[:-1] + (row[-1].isoformat(),)) for row in chunk
+        ).encode()
+
+
+class _DrainSink:
+    """
+    Write-only file object that hands written bytes back to the caller via
+    ``drain()`` while reporting a running position, which Parquet needs for
+    its row-group offsets.
+    """
+
+    closed = False
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def write(self, data):
+        data = bytes(data)
+        self.parts.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+    def drain(self):
+        data, self.parts = b"".join(self.parts), []
+        return data
+
+
+def _arrow_schema(pa):
+    money = pa.string()  # keep exact decimal text; cast downstream if needed
+    return pa.schema(
+        [
+            ("id", pa.int64()),
+            ("user_id", pa.string()),
+            ("user_email", pa.string()),
+            ("asset", pa.string()),
+            ("trade_type", pa.string()),
+            ("trade_status", pa.string()),
+            ("entry_price", money),
+            ("current_price", money),
+            ("take_profit", money),
+            ("stop_loss", money),
+            ("duration", pa.string()),
+            ("realized_pl", money),
+            ("unrealized_pl", money),
+            ("unrealized_pl_percent", money),
+            ("created_at", pa.timestamp("us", tz="UTC")),
+        ]
+    )
+
+
+def iter_columnar(chunks, file_format):
+    """Yields an Arrow IPC stream or a Parquet file, one record batch per chunk."""
+    import pyarrow as pa  # heavy import, only paid when exporting columnar data
+    import pyarrow.parquet as pq
+
+    schema = _arrow_schema(pa)
+    sink = _DrainSink()
+    if file_format == "parquet":
+        writer = pq.ParquetWriter(sink, schema)
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+
+    for chunk in chunks:
+        writer.write_batch(pa.record_batch(list(zip(*chunk)), schema=schema))
+        yield sink.drain()
+
+    writer.close()
+    yield sink.drain()
+
+
+def iter_export(queryset, file_format, chunk_size=DEFAULT_CHUNK_SIZE):
+    chunks = iter_export_rows(queryset, chunk_size=chunk_size)
+    if file_format == "csv":
+        return iter_csv(chunks)
+    return iter_columnar(chunks, file_format)
@@ -0,0 +1,115 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+
+from trades.benchmarking import execution_ms, seed_trades, seed_users_and_assets
+from trades.models import BuyAndSell
+
+DEFAULT_ROWS = 3_000_000
+DEFAULT_USERS = 5_000
+DEFAULT_ASSETS = 50
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the hot BuyAndSell queries with and without the composite "
+        "indexes on synthetic data (PostgreSQL only). Everything runs in one "
+        "transaction that is rolled back, so no data or schema change survives."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=DEFAULT_ROWS,
+            help=f"Synthetic trades to generate (default: {DEFAULT_ROWS})",
+        )
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=DEFAULT_USERS,
+            help=f"Synthetic users to spread trades over (default: {DEFAULT_USERS})",
+        )
+        parser.add_argument(
+            "--assets",
+            type=int,
+            default=DEFAULT_ASSETS,
+            help=f"Synthetic assets to spread trades over (default: {DEFAULT_ASSETS})",
+        )
+        parser.add_argument(
+            "--plans",
+            action="store_true",
+            help="Print the full EXPLAIN ANALYZE output, not just timings",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Query-plan benchmarks need PostgreSQL.")
+
+        rows, users, assets = options["rows"], options["users"], options["assets"]
+        with transaction.atomic():
+            # drop the composite indexes first: cheaper seeding, and "before"
+            with connection.schema_editor() as editor:
+                for index in BuyAndSell._meta.indexes:
+                    editor.remove_index(BuyAndSell, index)
+
+            user_ids, symbols = self.seed(rows, users, assets)
+            queries = self.hot_queries(user_ids[0], symbols[0])
+            before = self.explain_all(queries, options["plans"], "without indexes")
+
+            with connection.schema_editor() as editor:
+                for index in BuyAndSell._meta.indexes:
+                    editor.add_index(BuyAndSell, index)
+            after = self.explain_all(queries, options["plans"], "with indexes")
+
+            transaction.set_rollback(True)
+
+        self.stdout.write("")
+        self.stdout.write(f"{'query':<28}{'before (ms)':>14}{'after (ms)':>14}")
+        for name in queries:
+            self.stdout.write(f"{name:<28}{before[name]:>14.3f}{after[name]:>14.3f}")
+        self.stdout.write(self.style.SUCCESS("Benchmark done, synthetic data rolled back."))
+
+    def seed(self, rows, users, assets):
+        self.stdout.write(f"Seeding {users} users, {assets} assets and {rows} trades...")
+        user_ids, symbols = seed_users_and_assets(users, assets, "BENCH")
+        seed_trades(
+            rows,
+            {
+                "user_id": ("(%s::uuid[])[1 + (g %% %s)]", [user_ids, users]),
+                "asset": ("(%s::varchar[])[1 + ((g / 7) %% %s)]", [symbols, assets]),
+                "trade_type": ("CASE WHEN g %% 2 = 0 THEN 'buy' ELSE 'sell' END", []),
+                "trade_status": ("CASE WHEN g %% 10 = 0 THEN 'open' ELSE 'closed' END", []),
+                "entry_price": ("1 + (g %% 100000) / 100.0", []),
+                "created_at": ("now() - make_interval(secs => g)", []),
+            },
+        )
+        return user_ids, symbols
+
+    def hot_queries(self, user_id, symbol):
+        trades = BuyAndSell.objects.filter(user_id=user_id)
+        return {
+            "list page": trades.order_by("-created_at", "-id")[:50],
+            "list page (open)": trades.filter(trade_status="open").order_by(
+                "-created_at", "-id"
+            )[:50],
+            "open trades count": trades.filter(trade_status="open")
+            .values("user_id")
+            .annotate(n=Count("id")),
+            "duplicate open check": trades.filter(
+                asset_id=symbol, trade_type="buy", trade_status="open"
+            ).values("id")[:1],
+        }
+
+    def explain_all(self, queries, show_plans, label):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n== {label} =="))
+        timings = {}
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {connection.ops.quote_name(BuyAndSell._meta.db_table)}")
+        for name, queryset in queries.items():
+            plan = queryset.explain(analyze=True, buffers=True)
+            timings[name] = execution_ms(plan)
+            self.stdout.write(f"{name}: {timings[name]:.3f} ms")
+            if show_plans:
+                self.stdout.write(plan + "\n")
+        return timings
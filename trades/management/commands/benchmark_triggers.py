@@ -0,0 +1,126 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from trades.benchmarking import execution_ms, seed_trades, seed_users_and_assets
+from trades.triggers import evaluate_triggers, triggered_trades
+
+DEFAULT_OPEN = "10000,100000,1000000"
+DEFAULT_TRIGGERED = 100
+DEFAULT_USERS = 1_000
+DEFAULT_ASSETS = 20
+
+TICK_PRICE = Decimal("100")
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the TP/SL trigger engine against growing numbers of open "
+        "trades with a fixed number of triggered ones (PostgreSQL only). "
+        "Evaluation cost should track the triggered trades, not the open ones. "
+        "Everything runs in one transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--open",
+            type=str,
+            default=DEFAULT_OPEN,
+            help=f"Comma-separated open-trade counts to benchmark (default: {DEFAULT_OPEN})",
+        )
+        parser.add_argument(
+            "--triggered",
+            type=int,
+            default=DEFAULT_TRIGGERED,
+            help=f"Trades the benchmark tick triggers (default: {DEFAULT_TRIGGERED})",
+        )
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=DEFAULT_USERS,
+            help=f"Synthetic users to spread trades over (default: {DEFAULT_USERS})",
+        )
+        parser.add_argument(
+            "--assets",
+            type=int,
+            default=DEFAULT_ASSETS,
+            help=f"Synthetic assets to spread trades over (default: {DEFAULT_ASSETS})",
+        )
+        parser.add_argument(
+            "--plans",
+            action="store_true",
+            help="Print the EXPLAIN ANALYZE output of the trigger query",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Query-plan benchmarks need PostgreSQL.")
+        try:
+            sizes = [int(n) for n in options["open"].split(",") if n.strip()]
+        except ValueError:
+            raise CommandError("--open takes comma-separated integers.")
+
+        triggered = options["triggered"]
+        results = []
+        with transaction.atomic():
+            user_ids, symbols = seed_users_and_assets(
+                options["users"], options["assets"], "TRIG", price=TICK_PRICE
+            )
+            for size in sizes:
+                sid = transaction.savepoint()
+                self.seed_trades(size, min(triggered, size), user_ids, symbols)
+                results.append((size, *self.measure(symbols[0], options["plans"])))
+                transaction.savepoint_rollback(sid)
+            transaction.set_rollback(True)
+
+        self.stdout.write("")
+        self.stdout.write(f"{'open trades':>12}{'closed':>10}{'query (ms)':>14}{'evaluate (ms)':>16}")
+        for size, closed, query_ms, evaluate_ms in results:
+            self.stdout.write(f"{size:>12}{closed:>10}{query_ms:>14.3f}{evaluate_ms:>16.3f}")
+        self.stdout.write(self.style.SUCCESS("Benchmark done, synthetic data rolled back."))
+
+    def seed_trades(self, rows, triggered, user_ids, symbols):
+        """
+        Open trades around a price of 100. The first ``triggered`` rows are
+        buys on the benchmark symbol with a take profit the tick crosses;
+        every other level sits out of reach (TP 101-200, SL 1-99).
+        """
+        self.stdout.write(f"Seeding {rows} open trades ({triggered} to trigger)...")
+        seed_trades(
+            rows,
+            {
+                "user_id": ("(%s::uuid[])[1 + (g %% %s)]", [user_ids, len(user_ids)]),
+                "asset": (
+                    "CASE WHEN g <= %s THEN %s ELSE (%s::varchar[])[1 + (g %% %s)] END",
+                    [triggered, symbols[0], symbols, len(symbols)],
+                ),
+                "trade_type": (
+                    "CASE WHEN g <= %s OR g %% 2 = 0 THEN 'buy' ELSE 'sell' END",
+                    [triggered],
+                ),
+                "trade_status": ("'open'", []),
+                "entry_price": ("100", []),
+                "take_profit": (
+                    "CASE WHEN g <= %s THEN 99 WHEN g %% 2 = 0 THEN 101 + g %% 100 ELSE 99 - g %% 98 END",
+                    [triggered],
+                ),
+                "stop_loss": (
+                    "CASE WHEN g <= %s THEN 0 WHEN g %% 2 = 0 THEN 99 - g %% 98 ELSE 101 + g %% 100 END",
+                    [triggered],
+                ),
+                "created_at": ("now() - make_interval(secs => g)", []),
+            },
+        )
+
+    def measure(self, symbol, show_plan):
+        plan = triggered_trades(symbol, TICK_PRICE).explain(analyze=True, buffers=True)
+        query_ms = execution_ms(plan)
+        if show_plan:
+            self.stdout.write(plan + "\n")
+
+        started = time.perf_counter()
+        closed = evaluate_triggers({symbol: TICK_PRICE})
+        evaluate_ms = (time.perf_counter() - started) * 1000
+        return closed, query_ms, evaluate_ms
@@ -0,0 +1,59 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from trades.exports import DEFAULT_CHUNK_SIZE, EXPORT_FORMATS, export_queryset, iter_export
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Stream a user's (or every user's) trade history to CSV, Arrow IPC or Parquet"
+
+    def add_arguments(self, parser):
+        who = parser.add_mutually_exclusive_group(required=True)
+        who.add_argument("--user", type=str, help="Email of the user to export")
+        who.add_argument("--all", action="store_true", help="Export every user's trades")
+        parser.add_argument(
+            "--format",
+            dest="file_format",
+            choices=sorted(EXPORT_FORMATS),
+            default="csv",
+            help="Output format (default: csv)",
+        )
+        parser.add_argument(
+            "--output",
+            type=str,
+            help="File to write to (default: stdout, csv only)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help=f"Rows fetched from the DB per round trip (default: {DEFAULT_CHUNK_SIZE})",
+        )
+
+    def handle(self, *args, **options):
+        file_format = options["file_format"]
+        if not options.get("output") and file_format != "csv":
+            raise CommandError("--output is required for binary formats.")
+
+        user = None
+        if options.get("user"):
+            try:
+                user = User.objects.get(email=options["user"])
+            except User.DoesNotExist:
+                raise CommandError(f"No user with email {options['user']}.")
+
+        chunks = iter_export(
+            export_queryset(user), file_format, chunk_size=max(1, options["chunk_size"])
+        )
+        if options.get("output"):
+            with open(options["output"], "wb") as out:
+                size = sum(out.write(chunk) for chunk in chunks)
+            self.stderr.write(self.style.SUCCESS(f"Wrote {size} bytes to {options['output']}"))
+        else:
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.flush()
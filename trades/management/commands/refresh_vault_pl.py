@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from trades.rollups import refresh_vault_pl
+
+
+class Command(BaseCommand):
+    help = "Roll vault today/daily/weekly/monthly P&L and earnings up from the daily P&L buckets"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Rewrite every vault, not just those whose numbers can have moved",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        updated = refresh_vault_pl(full=options["full"])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Refreshed P&L of {updated} vault(s) in {elapsed:.2f}s"))
@@ -1,21 +1,26 @@
 # yourapp/management/commands/update_asset_prices.py
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
 from django.utils import timezone
 from decimal import Decimal
+import asyncio
+import httpx
 import requests
 import time
-import math
 
 from trades.models import Asset  # replace with your app name
+from trades.prices import persist_quotes
+from trades.providers import PROVIDER_NAMES, ProviderError, QuoteRecorder, ReplayProvider, get_provider
+from trades.ratelimit import AsyncTokenBucket
+from trades.scheduling import mark_fetched, plan_refresh, run_budget
 
-API_URL = "https://api.twelvedata.com/quote"  # batch quote endpoint
 DEFAULT_BATCH_SIZE = 50
 DEFAULT_DELAY_SECONDS = 8.0  # TwelveData basic: 8 calls/min => ~7.5s, use 8s to be safe
+DEFAULT_CONCURRENCY = 4  # in-flight batch requests in --async mode
 
 
 class Command(BaseCommand):
-    help = "Fetch and update asset prices from TwelveData (batching & rate-limit aware)"
+    help = "Fetch and update asset prices from a price provider (batching & rate-limit aware)"
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -35,6 +40,51 @@ class Command(BaseCommand):
             default=DEFAULT_DELAY_SECONDS,
             help=f"Seconds to pause between batch requests (default: {DEFAULT_DELAY_SECONDS})",
         )
+        parser.add_argument(
+            "--async",
+            dest="use_async",
+            action="store_true",
+            help="Fetch batches concurrently under a token-bucket limit instead of sleeping between them",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=DEFAULT_CONCURRENCY,
+            help=f"Max in-flight requests in --async mode (default: {DEFAULT_CONCURRENCY})",
+        )
+        parser.add_argument(
+            "--credits-per-minute",
+            type=int,
+            default=None,
+            help="Provider credit budget for --async mode (default: the provider's budget setting)",
+        )
+        parser.add_argument(
+            "--scheduled",
+            action="store_true",
+            help="Only refresh the symbols that are due, within one run's share of the credit budget",
+        )
+        parser.add_argument(
+            "--provider",
+            choices=PROVIDER_NAMES,
+            default=None,
+            help="Price source (default: settings.PRICE_PROVIDER)",
+        )
+        parser.add_argument(
+            "--replay-file",
+            type=str,
+            help="Recorded quote stream (JSON lines) for --provider replay",
+        )
+        parser.add_argument(
+            "--replay-speed",
+            type=float,
+            default=1.0,
+            help="Replay speed multiplier, 0 = as fast as possible (default: 1.0)",
+        )
+        parser.add_argument(
+            "--record",
+            type=str,
+            help="Append the fetched quotes to this file, for later replay",
+        )
         parser.add_argument(
             "--seed",
             action="store_true",
@@ -47,31 +97,96 @@ class Command(BaseCommand):
             self.seed_assets()
             return
 
+        try:
+            provider = get_provider(
+                options.get("provider") or settings.PRICE_PROVIDER,
+                replay_file=options.get("replay_file"),
+                replay_speed=options.get("replay_speed", 1.0),
+            )
+        except ProviderError as e:
+            raise CommandError(str(e))
+
         if options.get("symbols"):
             symbols = [s.strip() for s in options["symbols"].split(",") if s.strip()]
+        elif isinstance(provider, ReplayProvider):
+            symbols = None  # replay everything that was recorded
+        elif options.get("scheduled"):
+            budget = run_budget(
+                options.get("credits_per_minute") or provider.credits_per_minute,
+                settings.PRICE_REFRESH_RUN_SECONDS,
+            )
+            max_symbols = budget if provider.cost_per_symbol else budget * provider.max_batch_size
+            symbols = plan_refresh(max_symbols)
+            if not symbols:
+                self.stdout.write("No symbols due for a refresh.")
+                return
         else:
             symbols = list(Asset.objects.values_list("symbol", flat=True))
 
+        if isinstance(provider, ReplayProvider):
+            self.replay(provider, symbols)
+            return
+
         if not symbols:
             self.stdout.write(self.style.WARNING("No symbols to update. Add assets to the DB or pass --symbols."))
             return
 
         batch_size = max(1, int(options.get("batch_size", DEFAULT_BATCH_SIZE)))
+        batch_size = min(batch_size, provider.max_batch_size)
         delay = float(options.get("delay", DEFAULT_DELAY_SECONDS))
 
+        if options.get("use_async"):
+            credits = options.get("credits_per_minute") or provider.credits_per_minute
+            if provider.cost_per_symbol:
+                # billed per symbol, so a batch can't exceed a minute's budget
+                batch_size = min(batch_size, credits)
+
         # chunk symbols into batches
         total = len(symbols)
-        batches = math.ceil(total / batch_size)
-        self.stdout.write(f"Updating {total} symbols in {batches} batch(es) (batch_size={batch_size}, delay={delay}s)")
+        batches = [symbols[i : i + batch_size] for i in range(0, total, batch_size)]
+
+        if options.get("use_async"):
+            concurrency = max(1, int(options.get("concurrency", DEFAULT_CONCURRENCY)))
+            self.stdout.write(
+                f"Updating {total} symbols in {len(batches)} batch(es) "
+                f"(batch_size={batch_size}, concurrency={concurrency}, credits/min={credits})"
+            )
+            responses = asyncio.run(self.fetch_async(provider, batches, credits, concurrency))
+        else:
+            self.stdout.write(f"Updating {total} symbols in {len(batches)} batch(es) (batch_size={batch_size}, delay={delay}s)")
+            responses = self.fetch_sync(provider, batches, delay)
+
+        # collect the whole run, then write it in one transaction
+        quotes = {}
+        for batch, data in responses:
+            batch_quotes, problems = provider.parse(batch, data)
+            for sym, problem in problems.items():
+                self.stderr.write(self.style.WARNING(f"{sym}: {problem}"))
+            quotes.update(batch_quotes)
+
+        # attempted counts as fetched, so a failing symbol can't hog the budget
+        mark_fetched(symbols)
 
-        for i in range(0, total, batch_size):
-            batch = symbols[i : i + batch_size]
-            symbol_str = ",".join(batch)
+        if options.get("record"):
+            recorder = QuoteRecorder(options["record"])
+            recorder.write(quotes, timezone.now())
+            recorder.close()
 
-            params = {"symbol": symbol_str, "apikey": settings.TWELVE_DATA_API_KEY}
+        updated, created, unchanged = persist_quotes(quotes)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Asset price update completed: {updated} updated, {created} created, "
+                f"{unchanged} unchanged, {total - len(quotes)} without a price."
+            )
+        )
+
+    def fetch_sync(self, provider, batches, delay):
+        """Fetches batches one after another, sleeping ``delay`` between them."""
+        for n, batch in enumerate(batches):
+            params = provider.request_params(batch)
 
             try:
-                resp = requests.get(API_URL, params=params, timeout=15)
+                resp = requests.get(provider.url, params=params, timeout=15)
                 resp.raise_for_status()
                 data = resp.json()
             except Exception as e:
@@ -80,48 +195,62 @@ class Command(BaseCommand):
                 time.sleep(delay)
                 continue
 
-            # The API can return a mapping keyed by symbol for batch queries.
-            # Handle both dict-per-symbol and single-symbol responses.
-            for sym in batch:
-                # try exact key, then try variants
-                entry = data.get(sym) or data.get(sym.upper()) or data.get(sym.replace("/", "")) or data.get(sym.replace("/", "").upper())
-                if not entry:
-                    # Case: some APIs return a single dict (for single-symbol call) or error field
-                    # Try if top-level 'price' exists (single-symbol response)
-                    if isinstance(data, dict) and ("price" in data or "close" in data):
-                        entry = data
-                if not entry or not isinstance(entry, dict):
-                    self.stderr.write(self.style.WARNING(f"No data for symbol {sym}. Full response: {data}"))
-                    continue
-
-                # Prefer close -> price -> last
-                price_str = entry.get("close") or entry.get("price") or entry.get("last") or entry.get("value")
-                try:
-                    if price_str is None:
-                        raise ValueError("No price field found in API response for symbol")
-                    price = Decimal(str(price_str))
-                except Exception as e:
-                    self.stderr.write(self.style.ERROR(f"Failed to parse price for {sym}: {e} -- entry: {entry}"))
-                    continue
-
-                # Update or create the Asset row
-                # If the asset row already exists, update current_price and last_updated.
-                # If not, create a new Asset with empty name and default asset_type if needed.
-                obj, created = Asset.objects.update_or_create(
-                    symbol=sym,
-                    defaults={
-                        "current_price": price,
-                        "last_updated": timezone.now(),
-                    },
-                )
-                verb = "Created" if created else "Updated"
-                self.stdout.write(self.style.SUCCESS(f"{verb} Asset {sym}: {price}"))
+            yield batch, data
 
             # throttle between batches (avoid sleeping after final batch)
-            if i + batch_size < total:
+            if n + 1 < len(batches):
                 time.sleep(delay)
 
-        self.stdout.write(self.style.SUCCESS("Asset price update completed."))
+    async def fetch_async(self, provider, batches, credits_per_minute, concurrency):
+        """
+        Fetches all batches concurrently over pooled keep-alive connections.
+        Requests only wait on the credit budget, so a full refresh takes as
+        long as the rate limit demands and no longer.
+        """
+        bucket = AsyncTokenBucket(credits_per_minute)
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async with httpx.AsyncClient(limits=limits, timeout=15) as client:
+
+            async def fetch(batch):
+                await bucket.acquire(provider.credit_cost(batch))
+                params = provider.request_params(batch)
+                async with semaphore:
+                    try:
+                        resp = await client.get(provider.url, params=params)
+                        resp.raise_for_status()
+                        return batch, resp.json()
+                    except Exception as e:
+                        self.stderr.write(self.style.ERROR(f"API request failed for batch {batch}: {e}"))
+                        return batch, None
+
+            results = await asyncio.gather(*(fetch(batch) for batch in batches))
+
+        return [(batch, data) for batch, data in results if data is not None]
+
+    def replay(self, provider, symbols):
+        """
+        Feeds a recorded stream through the normal persistence path frame
+        by frame, so every frame costs what a live refresh would.
+        """
+        pace = f"{provider.speed}x" if provider.speed else "full speed"
+        self.stdout.write(f"Replaying {provider.path} at {pace}")
+        frames = quotes_total = 0
+        started = time.monotonic()
+        for _, quotes in provider.frames(symbols):
+            persist_quotes(quotes)
+            frames += 1
+            quotes_total += len(quotes)
+
+        elapsed = time.monotonic() - started
+        rate = quotes_total / elapsed if elapsed else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Replay completed: {frames} frame(s), {quotes_total} quote(s) "
+                f"in {elapsed:.2f}s ({rate:.0f} quotes/s)."
+            )
+        )
 
     def seed_assets(self):
         """Simple bootstrap list — change symbols/names/asset_type to match your needs."""
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from trades.ledger import VERIFY_CHUNK_SIZE, verify_ledger
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay the vault ledger in streaming chunks and report every user whose "
+        "checkpoints or vault balance drifted from it"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=VERIFY_CHUNK_SIZE,
+            help=f"Users verified per batch (default: {VERIFY_CHUNK_SIZE})",
+        )
+
+    def handle(self, *args, **options):
+        drifted = set()
+        for user_id, problem in verify_ledger(chunk_size=options["chunk_size"]):
+            drifted.add(user_id)
+            self.stdout.write(self.style.WARNING(f"{user_id}: {problem}"))
+
+        if drifted:
+            raise CommandError(f"Ledger drift found for {len(drifted)} user(s).")
+        self.stdout.write(self.style.SUCCESS("Ledger, checkpoints and vault balances agree."))
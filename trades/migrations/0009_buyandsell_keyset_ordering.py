@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-18 10:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trades', '0008_vault_today'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='buyandsell',
+            options={'ordering': ['-created_at', '-id']},
+        ),
+        migrations.AddIndex(
+            model_name='buyandsell',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='trade_user_created_idx'),
+        ),
+    ]
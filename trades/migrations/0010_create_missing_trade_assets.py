@@ -0,0 +1,51 @@
+# Generated by Django 5.2.3 on 2026-10-18 10:04
+
+from django.db import migrations
+from django.db.models.functions import Length
+
+
+def create_missing_assets(apps, schema_editor):
+    """
+    BuyAndSell.asset is about to become a FK to Asset.symbol, so every symbol
+    traded so far needs an Asset row first.
+
+    Symbols we don't know are created unclassified, so the price scheduler
+    leaves them alone until someone sets their type in the admin. Symbols
+    too long for Asset.symbol stop the migration here, before 0011 changes
+    the column.
+    """
+    Asset = apps.get_model("trades", "Asset")
+    BuyAndSell = apps.get_model("trades", "BuyAndSell")
+
+    max_length = Asset._meta.get_field("symbol").max_length
+    too_long = sorted(
+        BuyAndSell.objects.annotate(length=Length("asset"))
+        .filter(length__gt=max_length)
+        .values_list("asset", flat=True)
+        .distinct()
+    )
+    if too_long:
+        raise RuntimeError(
+            f"Trades reference symbols longer than {max_length} characters, "
+            f"fix them before migrating: {', '.join(too_long)}"
+        )
+
+    traded = set(BuyAndSell.objects.values_list("asset", flat=True).distinct())
+    known = set(Asset.objects.values_list("symbol", flat=True))
+    Asset.objects.bulk_create(
+        [
+            Asset(symbol=symbol, name=symbol, asset_type="unknown")
+            for symbol in sorted(traded - known)
+        ]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trades', '0009_buyandsell_keyset_ordering'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_missing_assets, migrations.RunPython.noop),
+    ]
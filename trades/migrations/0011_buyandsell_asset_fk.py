@@ -0,0 +1,29 @@
+# Generated by Django 5.2.3 on 2026-10-18 10:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trades', '0010_create_missing_trade_assets'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='buyandsell',
+            name='asset',
+            field=models.ForeignKey(db_column='asset', on_delete=django.db.models.deletion.PROTECT, related_name='trades', to='trades.asset', to_field='symbol'),
+        ),
+        migrations.AddIndex(
+            model_name='buyandsell',
+            index=models.Index(fields=['user', 'trade_status', '-created_at', '-id'], name='trade_user_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='buyandsell',
+            index=models.Index(fields=['user', 'asset', 'trade_type', 'trade_status'], name='trade_user_asset_side_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.3 on 2026-10-18 10:08
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_open_trades_count(apps, schema_editor):
+    BuyAndSell = apps.get_model("trades", "BuyAndSell")
+    Vault = apps.get_model("trades", "Vault")
+    Vault.objects.update(
+        open_trades_count=Coalesce(
+            Subquery(
+                BuyAndSell.objects.filter(user=OuterRef("user"), trade_status="open")
+                .values("user")
+                .annotate(n=Count("id"))
+                .values("n")
+            ),
+            0,
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trades', '0011_buyandsell_asset_fk'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vault',
+            name='open_trades_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_open_trades_count, migrations.RunPython.noop),
+    ]
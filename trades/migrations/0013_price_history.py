@@ -0,0 +1,44 @@
+# Generated by Django 5.2.3 on 2026-10-18 10:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trades', '0012_vault_open_trades_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceCandle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolution', models.CharField(choices=[('1m', '1 minute'), ('1h', '1 hour'), ('1d', '1 day')], max_length=2)),
+                ('bucket_start', models.DateTimeField()),
+                ('open', models.DecimalField(decimal_places=4, max_digits=20)),
+                ('high', models.DecimalField(decimal_places=4, max_digits=20)),
+                ('low', models.DecimalField(decimal_places=4, max_digits=20)),
+                ('close', models.DecimalField(decimal_places=4, max_digits=20)),
+                ('tick_count', models.PositiveIntegerField(default=0)),
+                ('asset', models.ForeignKey(db_column='asset', on_delete=django.db.models.deletion.CASCADE, related_name='candles', to='trades.asset', to_field='symbol')),
+            ],
+            options={
+                'ordering': ['asset', 'resolution', 'bucket_start'],
+                'constraints': [models.UniqueConstraint(fields=('asset', 'resolution', 'bucket_start'), name='candle_asset_resolution_bucket_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PriceTick',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('price', models.DecimalField(decimal_places=4, max_digits=20)),
+                ('recorded_at', models.DateTimeField()),
+                ('asset', models.ForeignKey(db_column='asset', on_delete=django.db.models.deletion.CASCADE, related_name='ticks', to='trades.asset', to_field='symbol')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['asset', 'recorded_at'], name='pricetick_asset_time_idx'), models.Index(fields=['recorded_at'], name='pricetick_time_idx')],
+            },
+        ),
+    ]
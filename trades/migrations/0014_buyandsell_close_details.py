@@ -0,0 +1,38 @@
+# Generated by Django 5.2.3 on 2026-10-18 10:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trades', '0013_price_history'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='buyandsell',
+            name='close_reason',
+            field=models.CharField(blank=True, choices=[('manual', 'Manual'), ('take_profit', 'Take profit'), ('stop_loss', 'Stop loss')], max_length=12),
+        ),
+        migrations.AddField(
+            model_name='buyandsell',
+            name='closed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='buyandsell',
+            name='exit_price',
+            field=models.DecimalField(blank=True, decimal_places=4, max_digits=12, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='buyandsell',
+            index=models.Index(condition=models.Q(('take_profit__gt', 0), ('trade_status', 'open')), fields=['asset', 'trade_type', 'take_profit'], name='trade_open_take_profit_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='buyandsell',
+            index=models.Index(condition=models.Q(('stop_loss__gt', 0), ('trade_status', 'open')), fields=['asset', 'trade_type', 'stop_loss'], name='trade_open_stop_loss_idx'),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.3 on 2026-10-18 10:27
+
+from django.conf import settings
+import re
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import F
+
+# frozen copy of trades.expiry.parse_duration
+DURATION_RE = re.compile(r"^\s*(\d+)\s*([a-z]+)\s*$", re.IGNORECASE)
+UNIT_ALIASES = {
+    **dict.fromkeys(("s", "sec", "secs", "second", "seconds"), "seconds"),
+    **dict.fromkeys(("m", "min", "mins", "minute", "minutes"), "minutes"),
+    **dict.fromkeys(("h", "hr", "hrs", "hour", "hours"), "hours"),
+    **dict.fromkeys(("d", "day", "days"), "days"),
+    **dict.fromkeys(("w", "wk", "wks", "week", "weeks"), "weeks"),
+}
+MAX_DURATION = timedelta(days=365)
+
+
+def parse_duration(value):
+    match = DURATION_RE.match(value or "")
+    if not match:
+        return None
+    unit = UNIT_ALIASES.get(match.group(2).lower())
+    amount = int(match.group(1))
+    if unit is None or amount == 0:
+        return None
+    try:
+        duration = timedelta(**{unit: amount})
+    except OverflowError:
+        return None
+    return duration if duration <= MAX_DURATION else None
+
+
+def backfill_expires_at(apps, schema_editor):
+    """One UPDATE per distinct duration among open trades."""
+    BuyAndSell = apps.get_model("trades", "BuyAndSell")
+    open_trades = BuyAndSell.objects.filter(trade_status="open")
+    for duration in open_trades.order_by().values_list("duration", flat=True).distinct():
+        delta = parse_duration(duration)
+        if delta is not None:
+            open_trades.filter(duration=duration).update(expires_at=F("created_at") + delta)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trades', '0014_buyandsell_close_details'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='buyandsell',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='buyandsell',
+            name='close_reason',
+            field=models.CharField(blank=True, choices=[('manual', 'Manual'), ('take_profit', 'Take profit'), ('stop_loss', 'Stop loss'), ('expired', 'Expired')], max_length=12),
+        ),
+        migrations.AddIndex(
+            model_name='buyandsell',
+            index=models.Index(condition=models.Q(('expires_at__isnull', False), ('trade_status', 'open')), fields=['expires_at'], name='trade_open_expires_idx'),
+        ),
+        migrations.RunPython(backfill_expires_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.3 on 2026-10-18 10:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_daily_pl(apps, schema_editor):
+    """Buckets for trades already closed with a close time, one grouped query."""
+    BuyAndSell = apps.get_model("trades", "BuyAndSell")
+    DailyPL = apps.get_model("trades", "DailyPL")
+    buckets = (
+        BuyAndSell.objects.filter(trade_status="closed", closed_at__isnull=False)
+        .annotate(day=TruncDate("closed_at"))
+        .order_by()
+        .values("user_id", "day")
+        .annotate(realized_pl=Sum("pl"), trades_closed=Count("id"))
+    )
+    DailyPL.objects.bulk_create((DailyPL(**bucket) for bucket in buckets.iterator()), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trades', '0015_buyandsell_expires_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyPL',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('realized_pl', models.DecimalField(decimal_places=4, default=0, max_digits=14)),
+                ('trades_closed', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_pl_buckets', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['user', 'day'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'day'), name='daily_pl_user_day_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_daily_pl, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.3 on 2026-10-18 10:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def open_ledgers(apps, schema_editor):
+    """Existing balances become each user's opening ledger entry."""
+    Vault = apps.get_model("trades", "Vault")
+    LedgerEntry = apps.get_model("trades", "LedgerEntry")
+    balances = Vault.objects.exclude(balance=0).order_by().values_list("user_id", "balance")
+    LedgerEntry.objects.bulk_create(
+        (
+            LedgerEntry(user_id=user_id, kind="opening", amount=balance, note="Balance before the ledger")
+            for user_id, balance in balances.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trades', '0016_daily_pl'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deposit',
+            name='amount',
+            field=models.DecimalField(decimal_places=2, default=0.0, max_digits=12),
+        ),
+        migrations.CreateModel(
+            name='BalanceCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('last_entry_id', models.BigIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_checkpoints', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['user', 'last_entry_id'],
+                'indexes': [models.Index(fields=['user', '-last_entry_id'], name='checkpoint_user_latest_idx'), models.Index(fields=['last_entry_id'], name='checkpoint_last_entry_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('opening', 'Opening balance'), ('deposit', 'Deposit'), ('settlement', 'Trade settlement'), ('adjustment', 'Manual adjustment')], max_length=12)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('note', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('deposit', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ledger_entries', to='trades.deposit')),
+                ('trade', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ledger_entries', to='trades.buyandsell')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'ledger entries',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['user', 'id'], name='ledger_user_id_idx')],
+            },
+        ),
+        migrations.RunPython(open_ledgers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 10:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trades', '0017_ledger'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='asset',
+            name='asset_type',
+            field=models.CharField(choices=[('crypto', 'Crypto'), ('forex', 'Forex'), ('stock', 'Stock'), ('unknown', 'Unclassified')], max_length=10),
+        ),
+    ]
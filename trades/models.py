@@ -21,8 +21,28 @@ class BuyAndSell(models.Model):
         (SELL, "Sell"),
     ]
 
+    MANUAL = "manual"
+    TAKE_PROFIT = "take_profit"
+    STOP_LOSS = "stop_loss"
+    EXPIRED = "expired"
+
+    CLOSE_REASON_CHOICES = [
+        (MANUAL, "Manual"),
+        (TAKE_PROFIT, "Take profit"),
+        (STOP_LOSS, "Stop loss"),
+        (EXPIRED, "Expired"),
+    ]
+
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="trades")
-    asset = models.CharField(max_length=100)
+    # Keyed on Asset.symbol, so ``asset_id`` is the symbol itself and hot
+    # paths can use it without joining Asset.
+    asset = models.ForeignKey(
+        "Asset",
+        to_field="symbol",
+        db_column="asset",
+        on_delete=models.PROTECT,
+        related_name="trades",
+    )
     trade_type = models.CharField(max_length=4, choices=TRADE_TYPE_CHOICES)
     trade_status = models.CharField(max_length=6, choices=TRADE_STATUS, default=OPEN)
     entry_price = models.DecimalField(max_digits=12, decimal_places=4, default=0.0000)
@@ -30,24 +50,67 @@ class BuyAndSell(models.Model):
     stop_loss = models.DecimalField(max_digits=12, decimal_places=4, default=0.0000)
 
     duration = models.CharField(max_length=20)
+    # created_at + duration, set when the trade is opened (see trades.expiry)
+    expires_at = models.DateTimeField(null=True, blank=True)
     pl = models.DecimalField(  # profit/loss
         max_digits=12, decimal_places=4, default=0.00, verbose_name="Profit/Loss"
     )
+    exit_price = models.DecimalField(max_digits=12, decimal_places=4, null=True, blank=True)
+    closed_at = models.DateTimeField(null=True, blank=True)
+    close_reason = models.CharField(max_length=12, choices=CLOSE_REASON_CHOICES, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        ordering = ["-created_at"]
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            # keyset pagination of a user's history (see TradeCursorPagination)
+            models.Index(
+                fields=["user", "-created_at", "-id"], name="trade_user_created_idx"
+            ),
+            # status-filtered listing and the open-trades count
+            models.Index(
+                fields=["user", "trade_status", "-created_at", "-id"],
+                name="trade_user_status_idx",
+            ),
+            # duplicate open trade check in TradeSerializer.validate
+            models.Index(
+                fields=["user", "asset", "trade_type", "trade_status"],
+                name="trade_user_asset_side_idx",
+            ),
+            # TP/SL trigger range scans over open trades (see trades.triggers)
+            models.Index(
+                fields=["asset", "trade_type", "take_profit"],
+                name="trade_open_take_profit_idx",
+                condition=models.Q(trade_status="open", take_profit__gt=0),
+            ),
+            models.Index(
+                fields=["asset", "trade_type", "stop_loss"],
+                name="trade_open_stop_loss_idx",
+                condition=models.Q(trade_status="open", stop_loss__gt=0),
+            ),
+            # expiry sweep: open trades in expires_at order
+            models.Index(
+                fields=["expires_at"],
+                name="trade_open_expires_idx",
+                condition=models.Q(trade_status="open", expires_at__isnull=False),
+            ),
+        ]
 
     def __str__(self):
-        return f"{self.user.get_full_name} - {self.asset.upper()} - {self.trade_type.upper()}"
+        return f"{self.user.get_full_name} - {self.asset_id.upper()} - {self.trade_type.upper()}"
     
 
 
 class Asset(models.Model):
+    # Assets nobody has classified yet (e.g. legacy symbols found in old
+    # trades); the refresh scheduler skips them until a type is set.
+    UNKNOWN = "unknown"
+
     ASSET_TYPE_CHOICES = [
         ('crypto', 'Crypto'),
         ('forex', 'Forex'),
         ('stock', 'Stock'),
+        (UNKNOWN, 'Unclassified'),
     ]
 
     name = models.CharField(max_length=100)
@@ -60,6 +123,73 @@ class Asset(models.Model):
         return f"{self.name} ({self.symbol})"
 
 
+class PriceTick(models.Model):
+    """Append-only record of every price the updater stored."""
+
+    asset = models.ForeignKey(
+        Asset,
+        to_field="symbol",
+        db_column="asset",
+        on_delete=models.CASCADE,
+        related_name="ticks",
+    )
+    price = models.DecimalField(max_digits=20, decimal_places=4)
+    recorded_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            # per-symbol rollups read ticks in time order
+            models.Index(fields=["asset", "recorded_at"], name="pricetick_asset_time_idx"),
+            # retention deletes by age across all symbols
+            models.Index(fields=["recorded_at"], name="pricetick_time_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.asset_id} {self.price} @ {self.recorded_at:%Y-%m-%d %H:%M:%S}"
+
+
+class PriceCandle(models.Model):
+    """OHLC candle rolled up from ticks (1m) or from finer candles (1h, 1d)."""
+
+    MINUTE = "1m"
+    HOUR = "1h"
+    DAY = "1d"
+
+    RESOLUTION_CHOICES = [
+        (MINUTE, "1 minute"),
+        (HOUR, "1 hour"),
+        (DAY, "1 day"),
+    ]
+
+    asset = models.ForeignKey(
+        Asset,
+        to_field="symbol",
+        db_column="asset",
+        on_delete=models.CASCADE,
+        related_name="candles",
+    )
+    resolution = models.CharField(max_length=2, choices=RESOLUTION_CHOICES)
+    bucket_start = models.DateTimeField()
+    open = models.DecimalField(max_digits=20, decimal_places=4)
+    high = models.DecimalField(max_digits=20, decimal_places=4)
+    low = models.DecimalField(max_digits=20, decimal_places=4)
+    close = models.DecimalField(max_digits=20, decimal_places=4)
+    tick_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["asset", "resolution", "bucket_start"]
+        constraints = [
+            # also the index behind range queries and rollup upserts
+            models.UniqueConstraint(
+                fields=["asset", "resolution", "bucket_start"],
+                name="candle_asset_resolution_bucket_uniq",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.asset_id} {self.resolution} {self.bucket_start:%Y-%m-%d %H:%M}"
+
+
 class Vault(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="vault")
     balance = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
@@ -68,15 +198,41 @@ class Vault(models.Model):
     daily_pl = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
     weekly_pl = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
     monthly_pl = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
+    # Denormalized for the dashboard; kept in step with F() updates and
+    # repaired by reconcile_open_trade_counts()
+    open_trades_count = models.PositiveIntegerField(default=0)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.user.get_full_name}'s Vault - Balance: {self.balance}"
 
 
+class DailyPL(models.Model):
+    """
+    Realized P&L a user booked on one (UTC) day. Settlement adds to the
+    bucket of the close date; the vault windows are summed from these.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="daily_pl_buckets")
+    day = models.DateField()
+    realized_pl = models.DecimalField(max_digits=14, decimal_places=4, default=0)
+    trades_closed = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["user", "day"]
+        constraints = [
+            # also the index behind the per-window sums
+            models.UniqueConstraint(fields=["user", "day"], name="daily_pl_user_day_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.user} {self.day}: {self.realized_pl}"
+
+
 class Deposit(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="deposits")
-    # amount = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
+    # set by staff from the receipt when approving
+    amount = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
     receipt = models.ImageField(upload_to="receipts/")
     is_approved = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -85,6 +241,69 @@ class Deposit(models.Model):
         return f"Deposit by {self.user} - Receipt uploaded"
 
 
+class LedgerEntry(models.Model):
+    """
+    Append-only record of every change to a vault balance. Entries are
+    never updated or deleted; a correction is a new adjustment entry.
+    """
+
+    OPENING = "opening"
+    DEPOSIT = "deposit"
+    SETTLEMENT = "settlement"
+    ADJUSTMENT = "adjustment"
+
+    KIND_CHOICES = [
+        (OPENING, "Opening balance"),
+        (DEPOSIT, "Deposit"),
+        (SETTLEMENT, "Trade settlement"),
+        (ADJUSTMENT, "Manual adjustment"),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="ledger_entries")
+    kind = models.CharField(max_length=12, choices=KIND_CHOICES)
+    # same precision as Vault.balance, so the two always add up to the cent
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    trade = models.ForeignKey(
+        BuyAndSell, null=True, blank=True, on_delete=models.SET_NULL, related_name="ledger_entries"
+    )
+    deposit = models.ForeignKey(
+        Deposit, null=True, blank=True, on_delete=models.SET_NULL, related_name="ledger_entries"
+    )
+    note = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
+        verbose_name_plural = "ledger entries"
+        indexes = [
+            # per-user tails after a checkpoint, and the ordered replay
+            models.Index(fields=["user", "id"], name="ledger_user_id_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.amount} for {self.user}"
+
+
+class BalanceCheckpoint(models.Model):
+    """A user's balance over every ledger entry up to ``last_entry_id``."""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="balance_checkpoints")
+    balance = models.DecimalField(max_digits=12, decimal_places=2)
+    last_entry_id = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["user", "last_entry_id"]
+        indexes = [
+            models.Index(fields=["user", "-last_entry_id"], name="checkpoint_user_latest_idx"),
+            # where the next checkpoint run starts
+            models.Index(fields=["last_entry_id"], name="checkpoint_last_entry_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user} {self.balance} @ {self.last_entry_id}"
+
+
 class Trader(models.Model):
     stars = models.PositiveSmallIntegerField()
     name = models.CharField(max_length=255)
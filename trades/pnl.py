@@ -0,0 +1,153 @@
+"""
+Batched profit/loss valuation.
+
+Prices are stored with 4 decimal places, so every price is turned into an
+integer count of ten-thousandths and the whole batch is valued with integer
+NumPy arithmetic. Rounding to 2 places is done half-even on those integers,
+which gives exactly what ``round(Decimal, 2)`` gave in the old per-row code
+(including ``-0.00`` for tiny losses) without a Decimal division per trade.
+"""
+
+from decimal import Decimal
+
+import numpy as np
+
+PRICE_PLACES = 4
+PRICE_SCALE = 10**PRICE_PLACES
+
+# Largest unit count whose PL% numerator (pl * 10_000 * 2) still fits int64.
+_INT64_SAFE = (2**63 - 1) // (PRICE_SCALE * 100)
+
+
+
+def _to_units(prices):
+    units = [
+        int(Decimal(p).scaleb(PRICE_PLACES).to_integral_value()) for p in prices
+    ]
+    if units and max(abs(u) for u in units) > _INT64_SAFE:
+        # absurdly large prices: stay exact with Python ints
+        return np.array(units, dtype=object)
+    return np.array(units, dtype=np.int64)
+
+
+def _div_round_half_even(num, den):
+    """Returns (|num / den| rounded half-even, is_negative) element-wise."""
+    negative = (num < 0) ^ (den < 0)
+    n = np.abs(num)
+    d = np.abs(den)
+    q = n // d
+    r = n % d
+    twice = r * 2
+    q = q + ((twice > d) | ((twice == d) & (q % 2 == 1)))
+    return q, negative
+
+
+def _format_hundredths(magnitude, negative):
+    magnitude = int(magnitude)
+    sign = "-" if negative else ""
+    return f"{sign}{magnitude // 100}.{magnitude % 100:02d}"
+
+
+class Valuation:
+    """P&L for one batch of trades, plus portfolio totals."""
+
+    def __init__(self, entry, pl):
+        self._entry = entry
+        self._pl = pl
+
+        # PL in hundredths
+        self._pl_mag, self._pl_neg = _div_round_half_even(
+            pl, np.full_like(pl, PRICE_SCALE // 100)
+        )
+
+        # PL% in hundredths of a percent: pl / entry * 100 * 100
+        zero_entry = entry == 0
+        safe_entry = np.where(zero_entry, 1, entry)
+        pct_mag, pct_neg = _div_round_half_even(pl * 10_000, safe_entry)
+        self._pct_mag = np.where(zero_entry, 0, pct_mag)
+        self._pct_neg = np.where(zero_entry, False, pct_neg)
+
+    def __len__(self):
+        return len(self._pl)
+
+    def pl(self, i):
+        return _format_hundredths(self._pl_mag[i], self._pl_neg[i])
+
+    def pl_percent(self, i):
+        return _format_hundredths(self._pct_mag[i], self._pct_neg[i])
+
+    def pl_list(self):
+        return [self.pl(i) for i in range(len(self))]
+
+    def pl_percent_list(self):
+        return [self.pl_percent(i) for i in range(len(self))]
+
+    @property
+    def total_pl(self):
+        total = np.array([self._pl.sum()], dtype=self._pl.dtype)
+        mag, neg = _div_round_half_even(total, np.array([PRICE_SCALE // 100]))
+        return _format_hundredths(mag[0], neg[0])
+
+    @property
+    def total_pl_percent(self):
+        total_entry = self._entry.sum()
+        if total_entry == 0:
+            return "0.00"
+        total = np.array([self._pl.sum() * 10_000], dtype=self._pl.dtype)
+        mag, neg = _div_round_half_even(total, np.array([total_entry]))
+        return _format_hundredths(mag[0], neg[0])
+
+
+def value_trades(entry_prices, sides, current_prices):
+    """
+    Values a batch of trades in one vectorized pass.
+
+    ``entry_prices`` and ``current_prices`` are parallel sequences of prices
+    (Decimal, str or int) and ``sides`` holds "buy"/"sell" for each trade.
+    A zero entry price yields a PL% of 0.00, as before.
+    """
+    entry = _to_units(entry_prices)
+    current = _to_units(current_prices)
+    if entry.dtype != current.dtype:
+        entry = entry.astype(object)
+        current = current.astype(object)
+
+    is_buy = np.asarray(sides, dtype=object) == "buy"
+    pl = np.where(is_buy, current - entry, entry - current)
+    if pl.dtype != entry.dtype:
+        pl = pl.astype(entry.dtype)
+    return Valuation(entry, pl)
+
+
+def settled_price(side, entry_price, pl):
+    """
+    The price a settled trade is valued at: the one its stored realized
+    ``pl`` implies. Valuing at it reproduces the stored P&L exactly; it is
+    the exit price whenever one was recorded.
+    """
+    entry, pl = Decimal(entry_price), Decimal(pl)
+    return entry + pl if side == "buy" else entry - pl
+
+
+def value_trade_objects(trades, prices):
+    """
+    Values ``BuyAndSell`` instances and stores ``current_price``,
+    ``live_pl`` and ``pl_percent`` on each of them. Open trades are valued
+    against a {symbol: price} snapshot (at their entry price when the asset
+    has no price); settled trades keep their stored exit price and P&L.
+    """
+    trades = list(trades)
+    current = [
+        prices.get(t.asset_id, t.entry_price)
+        if t.trade_status == "open"
+        else settled_price(t.trade_type, t.entry_price, t.pl)
+        for t in trades
+    ]
+    valuation = value_trades(
+        [t.entry_price for t in trades], [t.trade_type for t in trades], current
+    )
+    for i, trade in enumerate(trades):
+        trade.current_price = current[i] if trade.trade_status == "open" else trade.exit_price
+        trade.live_pl = Decimal(valuation.pl(i))
+        trade.pl_percent = Decimal(valuation.pl_percent(i))
+    return valuation
@@ -0,0 +1,205 @@
+import logging
+from decimal import Decimal
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils import timezone
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+from .models import Asset, PriceTick
+
+logger = logging.getLogger(__name__)
+
+# Live prices: one Redis hash {symbol: price} written by the updater, plus
+# a counter bumped on every publish so consumers can tell snapshots apart.
+LIVE_PRICES_KEY = "prices:live"
+LIVE_PRICES_VERSION_KEY = "prices:live:version"
+
+# NotImplementedError: the configured cache isn't Redis (e.g. locmem in dev)
+LIVE_PRICE_ERRORS = (RedisError, NotImplementedError)
+
+
+def get_price_snapshot(symbols=None):
+    """
+    Returns a {symbol: current_price} mapping.
+
+    Served from the live Redis hash with a single HMGET (HGETALL when
+    ``symbols`` is None); the database is only read when the hash is
+    missing, and then used to rebuild it. Symbols without a price are left
+    out, so callers can fall back with ``snapshot.get(symbol, default)``.
+    """
+    if symbols is not None:
+        symbols = list(set(symbols))
+        if not symbols:
+            return {}
+
+    try:
+        snapshot = _read_live_prices(symbols)
+    except LIVE_PRICE_ERRORS as e:
+        logger.warning("Live price hash unavailable, reading prices from the DB: %s", e)
+        return _load_db_prices(symbols)
+
+    if snapshot is None:
+        # cold start or flushed Redis: rebuild the whole hash from the DB
+        prices = _load_db_prices(None)
+        _warm_live_prices(prices)
+        if symbols is None:
+            return prices
+        return {symbol: prices[symbol] for symbol in symbols if symbol in prices}
+    return snapshot
+
+
+def get_price_snapshot_version():
+    """Current live snapshot version (0 before the first publish)."""
+    return int(get_redis_connection("default").get(LIVE_PRICES_VERSION_KEY) or 0)
+
+
+def publish_prices(quotes):
+    """
+    Writes ``quotes`` into the live hash and bumps the snapshot version in
+    one MULTI/EXEC. Returns the new version, or None if Redis is unavailable
+    (readers then fall back to the DB).
+    """
+    if not quotes:
+        return None
+    try:
+        pipe = get_redis_connection("default").pipeline()
+        pipe.hset(LIVE_PRICES_KEY, mapping={s: str(p) for s, p in quotes.items()})
+        pipe.incr(LIVE_PRICES_VERSION_KEY)
+        return pipe.execute()[-1]
+    except LIVE_PRICE_ERRORS as e:
+        logger.warning("Could not publish live prices: %s", e)
+        return None
+
+
+def _read_live_prices(symbols):
+    """Prices from the hash, or None if the hash doesn't exist."""
+    pipe = get_redis_connection("default").pipeline(transaction=False)
+    pipe.exists(LIVE_PRICES_KEY)
+    if symbols is None:
+        pipe.hgetall(LIVE_PRICES_KEY)
+        exists, found = pipe.execute()
+        found = found.items()
+    else:
+        pipe.hmget(LIVE_PRICES_KEY, symbols)
+        exists, values = pipe.execute()
+        found = zip(symbols, values)
+
+    if not exists:
+        return None
+    return {
+        symbol.decode() if isinstance(symbol, bytes) else symbol: Decimal(value.decode())
+        for symbol, value in found
+        if value is not None
+    }
+
+
+def _warm_live_prices(prices):
+    # HSETNX: never overwrite a fresher price the updater published meanwhile
+    if not prices:
+        return
+    try:
+        pipe = get_redis_connection("default").pipeline()
+        for symbol, price in prices.items():
+            pipe.hsetnx(LIVE_PRICES_KEY, symbol, str(price))
+        pipe.incr(LIVE_PRICES_VERSION_KEY)
+        pipe.execute()
+    except LIVE_PRICE_ERRORS as e:
+        logger.warning("Could not rebuild the live price hash: %s", e)
+
+
+def _load_db_prices(symbols):
+    assets = Asset.objects.filter(current_price__isnull=False)
+    if symbols is not None:
+        assets = assets.filter(symbol__in=symbols)
+    return dict(assets.values_list("symbol", "current_price"))
+
+
+class PriceChange(NamedTuple):
+    previous: Optional[Decimal]  # None for a symbol's first price
+    price: Decimal
+
+    @property
+    def delta(self):
+        return None if self.previous is None else self.price - self.previous
+
+    @property
+    def delta_percent(self):
+        if not self.previous:
+            return None
+        return (self.price - self.previous) / self.previous * 100
+
+
+# Sent after a price refresh commits, with ``changes`` ({symbol: PriceChange}
+# for the symbols that moved beyond the tolerance) and the live snapshot
+# ``version`` they were published under.
+prices_changed = Signal()
+
+PRICE_QUANTUM = Decimal("0.0001")  # Asset.current_price / PriceTick.price precision
+
+
+def is_price_change(previous, price):
+    if previous is None:
+        return True
+    return abs(price - previous) > abs(previous) * settings.PRICE_CHANGE_TOLERANCE
+
+
+def persist_quotes(quotes, batch_size=500):
+    """
+    Writes the quotes that moved beyond settings.PRICE_CHANGE_TOLERANCE in
+    one transaction: a single lookup of the existing rows, one
+    ``bulk_update`` for them, one ``bulk_create`` for unknown symbols
+    (created unclassified, see Asset.UNKNOWN) and one for the price history
+    ticks. Unchanged quotes cost no writes.
+
+    Once committed the changes are published to the live price hash and
+    announced with ``prices_changed``. Returns ``(updated, created,
+    unchanged)`` counts.
+    """
+    if not quotes:
+        return 0, 0, 0
+
+    quotes = {symbol: Decimal(price).quantize(PRICE_QUANTUM) for symbol, price in quotes.items()}
+    now = timezone.now()
+    with transaction.atomic():
+        existing = Asset.objects.select_for_update().in_bulk(
+            list(quotes), field_name="symbol"
+        )
+        changes = {}
+        moved = []
+        for symbol, asset in existing.items():
+            if not is_price_change(asset.current_price, quotes[symbol]):
+                continue
+            changes[symbol] = PriceChange(asset.current_price, quotes[symbol])
+            asset.current_price = quotes[symbol]
+            asset.last_updated = now  # bulk_update skips auto_now
+            moved.append(asset)
+        Asset.objects.bulk_update(moved, ["current_price", "last_updated"], batch_size=batch_size)
+
+        new = [
+            Asset(symbol=symbol, asset_type=Asset.UNKNOWN, current_price=price, last_updated=now)
+            for symbol, price in quotes.items()
+            if symbol not in existing
+        ]
+        Asset.objects.bulk_create(new, batch_size=batch_size)
+        changes.update((asset.symbol, PriceChange(None, asset.current_price)) for asset in new)
+
+        PriceTick.objects.bulk_create(
+            [
+                PriceTick(asset_id=symbol, price=change.price, recorded_at=now)
+                for symbol, change in changes.items()
+            ],
+            batch_size=batch_size,
+        )
+        if changes:
+            transaction.on_commit(lambda: announce_changes(changes))
+
+    return len(moved), len(new), len(quotes) - len(changes)
+
+
+def announce_changes(changes):
+    version = publish_prices({symbol: change.price for symbol, change in changes.items()})
+    prices_changed.send(sender=Asset, changes=changes, version=version)
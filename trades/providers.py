@@ -0,0 +1,203 @@
+"""
+Price providers for update_asset_prices.
+
+An HTTP provider turns a batch of symbols into one request and parses the
+response into normalized quotes ({symbol: Decimal}); the command owns the
+transport (sync with a delay, or async under a token bucket). The replay
+provider instead plays back a recorded quote stream from disk, so the whole
+ingestion -> valuation -> cache pipeline can be load-tested offline.
+
+Recorded streams are JSON lines, one quote per line:
+``{"ts": "2026-01-01T00:00:00Z", "symbol": "BTC/USD", "price": "64000.5"}``.
+Consecutive lines with the same ``ts`` form one frame.
+"""
+
+import json
+import time
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+
+
+class ProviderError(Exception):
+    pass
+
+
+class HttpPriceProvider:
+    name = None
+    url = None
+    max_batch_size = 50
+    # True when the provider bills per symbol rather than per request
+    cost_per_symbol = False
+
+    @property
+    def credits_per_minute(self):
+        raise NotImplementedError
+
+    def credit_cost(self, batch):
+        return len(batch) if self.cost_per_symbol else 1
+
+    def request_params(self, batch):
+        raise NotImplementedError
+
+    def parse(self, batch, data):
+        """Returns ``(quotes, problems)``: {symbol: Decimal} and {symbol: reason}."""
+        raise NotImplementedError
+
+
+class TwelveDataProvider(HttpPriceProvider):
+    name = "twelvedata"
+    url = "https://api.twelvedata.com/quote"  # batch quote endpoint
+    max_batch_size = 120
+    cost_per_symbol = True
+
+    @property
+    def credits_per_minute(self):
+        return settings.TWELVE_DATA_CREDITS_PER_MINUTE
+
+    def request_params(self, batch):
+        return {"symbol": ",".join(batch), "apikey": settings.TWELVE_DATA_API_KEY}
+
+    def parse(self, batch, data):
+        quotes, problems = {}, {}
+        # The API can return a mapping keyed by symbol for batch queries.
+        # Handle both dict-per-symbol and single-symbol responses.
+        for sym in batch:
+            # try exact key, then try variants
+            entry = data.get(sym) or data.get(sym.upper()) or data.get(sym.replace("/", "")) or data.get(sym.replace("/", "").upper())
+            if not entry:
+                # Case: some APIs return a single dict (for single-symbol call) or error field
+                # Try if top-level 'price' exists (single-symbol response)
+                if isinstance(data, dict) and ("price" in data or "close" in data):
+                    entry = data
+            if not entry or not isinstance(entry, dict):
+                problems[sym] = f"No data for symbol. Full response: {data}"
+                continue
+
+            # Prefer close -> price -> last
+            price_str = entry.get("close") or entry.get("price") or entry.get("last") or entry.get("value")
+            try:
+                if price_str is None:
+                    raise ValueError("No price field found in API response for symbol")
+                quotes[sym] = Decimal(str(price_str))
+            except (ValueError, InvalidOperation) as e:
+                problems[sym] = f"Failed to parse price: {e} -- entry: {entry}"
+        return quotes, problems
+
+
+class FinnhubProvider(HttpPriceProvider):
+    """
+    Finnhub's quote endpoint takes one symbol per call. Symbols are sent as
+    stored, so crypto/forex assets need Finnhub's exchange-prefixed form
+    (e.g. ``BINANCE:BTCUSDT``).
+    """
+
+    name = "finnhub"
+    url = "https://finnhub.io/api/v1/quote"
+    max_batch_size = 1
+
+    @property
+    def credits_per_minute(self):
+        return settings.FINNHUB_CALLS_PER_MINUTE
+
+    def request_params(self, batch):
+        return {"symbol": batch[0], "token": settings.FINNHUB_API_KEY}
+
+    def parse(self, batch, data):
+        sym = batch[0]
+        # unknown symbols come back as all-zero quotes rather than an error
+        price = data.get("c") if isinstance(data, dict) else None
+        if not price:
+            return {}, {sym: f"No data for symbol. Full response: {data}"}
+        try:
+            return {sym: Decimal(str(price))}, {}
+        except InvalidOperation as e:
+            return {}, {sym: f"Failed to parse price: {e} -- entry: {data}"}
+
+
+class ReplayProvider:
+    """
+    Plays back a recorded quote stream. ``speed`` scales the recorded gaps
+    between frames (2.0 = twice as fast); 0 replays as fast as possible.
+    """
+
+    name = "replay"
+
+    def __init__(self, path, speed=1.0):
+        if not path:
+            raise ProviderError("The replay provider needs a recorded quote file.")
+        if speed < 0:
+            raise ProviderError("Replay speed can't be negative.")
+        self.path = path
+        self.speed = speed
+
+    def frames(self, symbols=None):
+        """Yields ``(recorded_at, quotes)`` frames, paced like the recording."""
+        wanted = set(symbols) if symbols else None
+        started = time.monotonic()
+        first_ts = None
+        for ts, quotes in self._read_frames():
+            if wanted is not None:
+                quotes = {s: p for s, p in quotes.items() if s in wanted}
+                if not quotes:
+                    continue
+            if self.speed:
+                first_ts = first_ts or ts
+                due = (ts - first_ts).total_seconds() / self.speed
+                wait = due - (time.monotonic() - started)
+                if wait > 0:
+                    time.sleep(wait)
+            yield ts, quotes
+
+    def _read_frames(self):
+        frame_ts, quotes = None, {}
+        with open(self.path) as f:
+            for n, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                    ts = datetime.fromisoformat(record["ts"].replace("Z", "+00:00"))
+                    symbol, price = record["symbol"], Decimal(str(record["price"]))
+                except (ValueError, KeyError, TypeError, InvalidOperation) as e:
+                    raise ProviderError(f"{self.path}:{n}: bad quote record ({e})")
+                if ts != frame_ts and quotes:
+                    yield frame_ts, quotes
+                    quotes = {}
+                frame_ts = ts
+                quotes[symbol] = price
+        if quotes:
+            yield frame_ts, quotes
+
+
+class QuoteRecorder:
+    """Appends quotes to a replay file in the ReplayProvider format."""
+
+    def __init__(self, path):
+        self.file = open(path, "a")
+
+    def write(self, quotes, recorded_at):
+        ts = recorded_at.isoformat().replace("+00:00", "Z")
+        self.file.writelines(
+            json.dumps({"ts": ts, "symbol": symbol, "price": str(price)}) + "\n"
+            for symbol, price in quotes.items()
+        )
+
+    def close(self):
+        self.file.close()
+
+
+HTTP_PROVIDERS = {
+    provider.name: provider for provider in (TwelveDataProvider, FinnhubProvider)
+}
+PROVIDER_NAMES = (*HTTP_PROVIDERS, ReplayProvider.name)
+
+
+def get_provider(name, replay_file=None, replay_speed=1.0):
+    if name == ReplayProvider.name:
+        return ReplayProvider(replay_file, replay_speed)
+    try:
+        return HTTP_PROVIDERS[name]()
+    except KeyError:
+        raise ProviderError(f"Unknown price provider {name!r}. Use one of: {', '.join(PROVIDER_NAMES)}.")
@@ -0,0 +1,38 @@
+import asyncio
+import time
+
+
+class AsyncTokenBucket:
+    """
+    Token bucket for provider credit budgets.
+
+    Refills ``rate_per_minute`` tokens per minute up to ``capacity`` (a full
+    minute's budget by default) and makes callers wait just long enough for
+    the tokens they need, instead of sleeping a fixed delay between calls.
+    """
+
+    def __init__(self, rate_per_minute, capacity=None):
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute must be positive")
+        self.rate = rate_per_minute / 60.0  # tokens per second
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self, tokens=1):
+        if tokens > self.capacity:
+            raise ValueError(f"Cannot acquire {tokens} tokens from a bucket of {self.capacity}")
+
+        # One waiter at a time keeps acquisition FIFO-fair
+        async with self._lock:
+            self._refill()
+            while self.tokens < tokens:
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= tokens
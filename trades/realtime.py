@@ -0,0 +1,62 @@
+"""
+Channel-layer groups and broadcasts for live price pushes.
+
+Every symbol has a group that websocket consumers of its holders join, and
+every user has a group used to tell their consumers that holdings changed.
+Broadcasts are fire-and-forget: a missing or unreachable channel layer must
+never fail a price refresh or a trade write.
+"""
+
+import logging
+import re
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+logger = logging.getLogger(__name__)
+
+# Group names may only contain ASCII alphanumerics, hyphens, underscores and
+# periods, so anything else (e.g. the "/" in "BTC/USD") is hex-escaped.
+_GROUP_UNSAFE = re.compile(r"[^A-Za-z0-9-]")
+
+
+def price_group(symbol):
+    return "prices." + _GROUP_UNSAFE.sub(lambda m: f"_{ord(m.group()):02x}", symbol)
+
+
+def user_group(user_id):
+    return f"user.{user_id}"
+
+
+def broadcast_prices(quotes, version=None):
+    """Sends one ``price.update`` message per symbol to that symbol's group."""
+    if not quotes:
+        return
+    messages = [
+        (
+            price_group(symbol),
+            {"type": "price.update", "symbol": symbol, "price": str(price), "version": version},
+        )
+        for symbol, price in quotes.items()
+    ]
+    _send(messages)
+
+
+def notify_holdings_changed(user_id):
+    """Tells the user's open sockets to reload positions and subscriptions."""
+    _send([(user_group(user_id), {"type": "holdings.changed"})])
+
+
+def _send(messages):
+    layer = get_channel_layer()
+    if layer is None:
+        return
+
+    async def send_all():
+        for group, message in messages:
+            await layer.group_send(group, message)
+
+    try:
+        async_to_sync(send_all)()
+    except Exception as e:  # broker hiccups must not fail the caller
+        logger.warning("Could not broadcast to the channel layer: %s", e)
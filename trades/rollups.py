@@ -0,0 +1,127 @@
+"""
+Vault P&L rollups.
+
+Settlement adds each close's realized P&L to the user's bucket for the
+close date (``DailyPL``), set-based, in the closing transaction. The vault
+columns are then rolled forward by one scheduled UPDATE over all vaults:
+
+- ``today``: realized P&L booked today
+- ``daily_pl`` / ``weekly_pl`` / ``monthly_pl``: realized P&L since the start
+  of the day / ISO week / month, plus the unrealized P&L of open trades at
+  the stored asset prices
+- ``earning``: lifetime realized P&L
+
+Days, weeks and months are UTC, like the rest of the trade timestamps. As
+everywhere else in the app, P&L is per unit (price delta, signed by side).
+"""
+
+import time
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Case, DecimalField, Exists, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import BuyAndSell, DailyPL, Vault
+
+VAULT_PL_VERSION_KEY = "vault_pl_version"
+
+PL_FIELD = DecimalField(max_digits=14, decimal_places=4)
+
+
+def record_realized_pl(trade_ids, day):
+    """
+    Adds the realized P&L of the just-closed ``trade_ids`` to their users'
+    ``day`` buckets with a single INSERT ... SELECT ... ON CONFLICT, so
+    concurrent settlements add up instead of overwriting each other.
+    """
+    if not trade_ids:
+        return
+    buckets = connection.ops.quote_name(DailyPL._meta.db_table)
+    trades = connection.ops.quote_name(BuyAndSell._meta.db_table)
+    placeholders = ", ".join(["%s"] * len(trade_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {buckets} (user_id, day, realized_pl, trades_closed) "
+            f"SELECT user_id, %s, SUM(pl), COUNT(*) FROM {trades} "
+            f"WHERE id IN ({placeholders}) GROUP BY user_id "
+            f"ON CONFLICT (user_id, day) DO UPDATE SET "
+            f"realized_pl = {buckets}.realized_pl + EXCLUDED.realized_pl, "
+            f"trades_closed = {buckets}.trades_closed + EXCLUDED.trades_closed",
+            [connection.ops.adapt_datefield_value(day), *trade_ids],
+        )
+
+
+def realized_since(day=None):
+    """Per-vault sum of the user's buckets from ``day`` on (all of them if None)."""
+    buckets = DailyPL.objects.filter(user=OuterRef("user"))
+    if day is not None:
+        buckets = buckets.filter(day__gte=day)
+    total = buckets.order_by().values("user").annotate(total=Sum("realized_pl")).values("total")
+    return Coalesce(Subquery(total, output_field=PL_FIELD), Value(0), output_field=PL_FIELD)
+
+
+def unrealized_pl():
+    """Per-vault unrealized P&L of the open trades at the assets' stored prices."""
+    price = F("asset__current_price")
+    total = (
+        BuyAndSell.objects.filter(
+            user=OuterRef("user"),
+            trade_status=BuyAndSell.OPEN,
+            asset__current_price__isnull=False,
+        )
+        .order_by()
+        .values("user")
+        .annotate(
+            total=Sum(
+                Case(
+                    When(trade_type=BuyAndSell.BUY, then=price - F("entry_price")),
+                    default=F("entry_price") - price,
+                    output_field=PL_FIELD,
+                )
+            )
+        )
+        .values("total")
+    )
+    return Coalesce(Subquery(total, output_field=PL_FIELD), Value(0), output_field=PL_FIELD)
+
+
+def refresh_vault_pl(now=None, full=False):
+    """
+    Rolls every vault's P&L columns forward to ``now`` with one UPDATE and
+    returns how many vaults it wrote.
+
+    Only vaults whose numbers can move are touched: those with open trades,
+    with buckets in the current week or month, or still showing a non-zero
+    window that a period boundary has to reset. ``full`` rewrites every
+    vault, e.g. once after hand-edited values.
+    """
+    today = timezone.localdate(now or timezone.now())
+    week_start = today - timedelta(days=today.weekday())
+    month_start = today.replace(day=1)
+
+    vaults = Vault.objects.all()
+    if not full:
+        recent = DailyPL.objects.filter(user=OuterRef("user"), day__gte=min(week_start, month_start))
+        vaults = vaults.filter(
+            Q(open_trades_count__gt=0)
+            | Exists(recent)
+            | ~Q(today=0)
+            | ~Q(daily_pl=0)
+            | ~Q(weekly_pl=0)
+            | ~Q(monthly_pl=0)
+        )
+
+    unrealized = unrealized_pl()
+    updated = vaults.update(
+        today=realized_since(today),
+        daily_pl=realized_since(today) + unrealized,
+        weekly_pl=realized_since(week_start) + unrealized,
+        monthly_pl=realized_since(month_start) + unrealized,
+        earning=realized_since(),
+    )
+    # one bump instead of a cache delete per user; dashboards compare it
+    cache.set(VAULT_PL_VERSION_KEY, time.time_ns(), timeout=None)
+    return updated
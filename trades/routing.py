@@ -0,0 +1,7 @@
+from django.urls import path
+
+from .consumers import PriceConsumer
+
+websocket_urlpatterns = [
+    path("ws/prices/", PriceConsumer.as_asgi()),
+]
@@ -0,0 +1,136 @@
+"""
+Adaptive price refresh scheduling.
+
+Each asset gets a refresh cadence from its asset_type, whether its market
+is open and how many open trades reference it. Every scheduler run picks
+the symbols whose cadence has elapsed, most overdue (and most held) first,
+and packs them into the credits the provider grants per run. The time of
+each symbol's last fetch lives in a Redis hash, so runs need no DB writes.
+"""
+
+import logging
+import math
+import time
+from datetime import datetime, time as dt_time
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db.models import Count
+from django_redis import get_redis_connection
+
+from .models import Asset, BuyAndSell
+from .prices import LIVE_PRICE_ERRORS
+
+logger = logging.getLogger(__name__)
+
+FETCHED_AT_KEY = "prices:fetched_at"
+
+NEW_YORK = ZoneInfo("America/New_York")
+STOCK_SESSION = (dt_time(9, 30), dt_time(16, 0))  # NYSE/Nasdaq regular hours
+FOREX_ROLLOVER = dt_time(17, 0)  # the FX week runs Sun 17:00 -> Fri 17:00 NY
+
+
+def is_market_open(asset_type, now):
+    """Regular-session check; exchange holidays come from settings.MARKET_HOLIDAYS."""
+    local = now.astimezone(NEW_YORK)
+    if asset_type == "stock":
+        if local.weekday() >= 5 or local.date().isoformat() in settings.MARKET_HOLIDAYS:
+            return False
+        return STOCK_SESSION[0] <= local.time() < STOCK_SESSION[1]
+    if asset_type == "forex":
+        weekday = local.weekday()
+        if weekday == 5:
+            return False
+        if weekday == 6:
+            return local.time() >= FOREX_ROLLOVER
+        if weekday == 4:
+            return local.time() < FOREX_ROLLOVER
+        return True
+    return True  # crypto trades around the clock
+
+
+def refresh_interval(asset_type, open_trades, now):
+    """
+    Seconds between refreshes for one asset: the asset_type's base cadence,
+    stretched to the closed-market cadence outside trading hours, slowed
+    for symbols nobody holds and sped up for heavily held ones.
+    """
+    if not is_market_open(asset_type, now):
+        return settings.PRICE_REFRESH_CLOSED_MARKET_SECONDS
+    interval = settings.PRICE_REFRESH_SECONDS.get(asset_type, settings.PRICE_REFRESH_SECONDS["default"])
+    if open_trades == 0:
+        return interval * settings.PRICE_REFRESH_IDLE_FACTOR
+    if open_trades >= settings.PRICE_REFRESH_HOT_TRADES:
+        return max(settings.PRICE_REFRESH_MIN_SECONDS, interval / 2)
+    return interval
+
+
+def open_trades_per_symbol():
+    return dict(
+        BuyAndSell.objects.filter(trade_status=BuyAndSell.OPEN)
+        .values("asset")
+        .annotate(n=Count("id"))
+        .values_list("asset", "n")
+    )
+
+
+def get_fetched_at(symbols):
+    """{symbol: unix time of its last fetch}; unknown symbols are left out."""
+    if not symbols:
+        return {}
+    try:
+        values = get_redis_connection("default").hmget(FETCHED_AT_KEY, symbols)
+    except LIVE_PRICE_ERRORS as e:
+        logger.warning("Fetch times unavailable, treating every symbol as due: %s", e)
+        return {}
+    return {symbol: float(value) for symbol, value in zip(symbols, values) if value is not None}
+
+
+def mark_fetched(symbols, at=None):
+    if not symbols:
+        return
+    at = at or time.time()
+    try:
+        get_redis_connection("default").hset(FETCHED_AT_KEY, mapping={s: at for s in symbols})
+    except LIVE_PRICE_ERRORS as e:
+        logger.warning("Could not record fetch times: %s", e)
+
+
+def plan_refresh(max_symbols, now=None):
+    """
+    Returns up to ``max_symbols`` symbols whose refresh is due, most
+    overdue first; ties (e.g. never fetched) go to the most held symbol.
+    Unclassified assets are left out until someone sets their type.
+    """
+    now = now or datetime.now(tz=NEW_YORK)
+    assets = list(
+        Asset.objects.exclude(asset_type=Asset.UNKNOWN).values_list("symbol", "asset_type")
+    )
+    held = open_trades_per_symbol()
+    fetched_at = get_fetched_at([symbol for symbol, _ in assets])
+    epoch_now = now.timestamp()
+
+    due = []
+    for symbol, asset_type in assets:
+        interval = refresh_interval(asset_type, held.get(symbol, 0), now)
+        last = fetched_at.get(symbol)
+        overdue = float("inf") if last is None else (epoch_now - last) / interval
+        if overdue >= 1:
+            due.append((overdue, held.get(symbol, 0), symbol))
+
+    due.sort(reverse=True)
+    return [symbol for _, _, symbol in due[: max(0, max_symbols)]]
+
+
+def run_budget(credits_per_minute, run_every_seconds):
+    """Credits one scheduler run may spend when runs come every ``run_every_seconds``."""
+    return int(credits_per_minute * run_every_seconds // 60)
+
+
+def max_run_seconds(credits, credits_per_minute):
+    """
+    Longest an update run spending ``credits`` can take: the minutes those
+    credits need at the provider's rate, plus a minute of slack for the
+    requests themselves and the DB write.
+    """
+    return math.ceil(credits / credits_per_minute) * 60 + 60
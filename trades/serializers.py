@@ -1,18 +1,60 @@
 from rest_framework import serializers
-from .models import BuyAndSell, Vault, Deposit, Trader
+from django.db import models
+from .models import BuyAndSell, Vault, Deposit, Trader, Asset
+from .pnl import value_trade_objects
+from .prices import get_price_snapshot
+from .expiry import parse_duration
+
+
+class TradeListSerializer(serializers.ListSerializer):
+    """
+    Values every trade in the list with one price snapshot and one
+    vectorized P&L pass before the rows are serialized.
+    """
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        trades = list(iterable)
+        prices = self.context.get("prices")
+        if prices is None:
+            prices = get_price_snapshot({trade.asset_id for trade in trades})
+        value_trade_objects(trades, prices)
+        return [self.child.to_representation(trade) for trade in trades]
+
+
+class AssetSymbolField(serializers.SlugRelatedField):
+    """
+    Accepts and renders an asset by symbol. Output is read straight from the
+    ``asset`` FK column, so listing trades never loads the Asset rows.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("slug_field", "symbol")
+        kwargs.setdefault("queryset", Asset.objects.all())
+        super().__init__(**kwargs)
+
+    def use_pk_only_optimization(self):
+        return True
+
+    def to_representation(self, value):
+        return value.pk
 
 
 class TradeSerializer(serializers.ModelSerializer):
+    asset = AssetSymbolField()
     current_price = serializers.DecimalField(
         max_digits=20, decimal_places=8, read_only=True
     )
-    pl = serializers.DecimalField(max_digits=20, decimal_places=8, read_only=True)
+    pl = serializers.DecimalField(
+        source="live_pl", max_digits=20, decimal_places=8, read_only=True
+    )
     pl_percent = serializers.DecimalField(
         max_digits=6, decimal_places=2, read_only=True
     )
 
     class Meta:
         model = BuyAndSell
+        list_serializer_class = TradeListSerializer
         fields = [
             "id",
             "asset",
@@ -25,10 +67,12 @@ class TradeSerializer(serializers.ModelSerializer):
             "pl",
             "pl_percent",
             "trade_status",
+            "expires_at",
             "created_at",
         ]
         read_only_fields = [
             "id",
+            "expires_at",
             "created_at",
             "pl",
             "pl_percent",
@@ -37,6 +81,22 @@ class TradeSerializer(serializers.ModelSerializer):
             "trade_status",
         ]
 
+    def to_representation(self, instance):
+        if not hasattr(instance, "live_pl"):
+            prices = self.context.get("prices")
+            if prices is None:
+                prices = get_price_snapshot([instance.asset_id])
+            value_trade_objects([instance], prices)
+        return super().to_representation(instance)
+
+    def validate_duration(self, value):
+        if parse_duration(value) is None:
+            raise serializers.ValidationError(
+                "Invalid duration. Use a number and a unit, e.g. 30m, 4h, 2d or 1w, "
+                "up to 365 days."
+            )
+        return value
+
     def validate(self, data):
         """
         Cross-field validation for trade logic.
@@ -64,11 +124,26 @@ class TradeSerializer(serializers.ModelSerializer):
             user=user, asset=asset, trade_type=trade_type, trade_status="open"
         ).exists():
             raise serializers.ValidationError(
-                f"You already have an open {trade_type.upper()} trade for {asset.upper()}."
+                f"You already have an open {trade_type.upper()} trade for {asset.symbol.upper()}."
             )
         return data
 
 
+class TradeIntentSerializer(serializers.ModelSerializer):
+    """
+    One item of a batch open. Validation here is per item and DB-free; the
+    batch view checks assets and duplicates against data it loads once.
+    """
+
+    asset = serializers.CharField(max_length=20)
+
+    class Meta:
+        model = BuyAndSell
+        fields = ["asset", "trade_type", "duration", "take_profit", "stop_loss"]
+
+    validate_duration = TradeSerializer.validate_duration
+
+
 class VaultSerializer(serializers.ModelSerializer):
     class Meta:
         model = Vault
@@ -112,8 +187,8 @@ class DepositSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Deposit
-        fields = ["id", "user", "receipt", "is_approved", "created_at"]
-        read_only_fields = ["id", "is_approved", "created_at"]
+        fields = ["id", "user", "receipt", "amount", "is_approved", "created_at"]
+        read_only_fields = ["id", "amount", "is_approved", "created_at"]
 
     # def validate_amount(self, value):
     #     if value <= 0:
@@ -141,6 +216,8 @@ class DashboardSerializer(serializers.Serializer):
     daily_pl = serializers.DecimalField(max_digits=12, decimal_places=2)
     weekly_pl = serializers.DecimalField(max_digits=12, decimal_places=2)
     monthly_pl = serializers.DecimalField(max_digits=12, decimal_places=2)
+    unrealized_pl = serializers.DecimalField(max_digits=20, decimal_places=2)
+    unrealized_pl_percent = serializers.DecimalField(max_digits=12, decimal_places=2)
     active_trades_count = serializers.IntegerField()
     referral_count = serializers.IntegerField()
     referral_link = serializers.CharField()
@@ -0,0 +1,152 @@
+"""
+Set-based trade settlement.
+
+Every path that closes trades goes through ``settle_trades`` (bulk: TP/SL
+triggers, expiry) or ``close_trade`` (one trade, by its owner) so exit
+prices, realized P&L, the vault balances and their ledger entries, the
+open-trade counters, the per-user caches and the users' daily P&L buckets
+always move together.
+"""
+
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, OuterRef, Subquery, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import BuyAndSell, Vault
+from .ledger import record_settlements, settlement_total
+from .prices import get_price_snapshot
+from .rollups import record_realized_pl
+from .utils import clear_trade_caches
+
+PRICE_FIELD = DecimalField(max_digits=12, decimal_places=4)
+
+
+class UnpricedTradeError(Exception):
+    """The trade's asset has no price yet, so it can't be closed."""
+
+    def __init__(self, symbol):
+        super().__init__(f"No live price for {symbol} yet.")
+        self.symbol = symbol
+
+
+def exit_price_expression(prices):
+    """SQL expression picking each row's exit price from ``{symbol: price}``."""
+    if len(prices) == 1:
+        return Value(next(iter(prices.values())), output_field=PRICE_FIELD)
+    return Case(
+        *[When(asset_id=symbol, then=Value(price)) for symbol, price in prices.items()],
+        output_field=PRICE_FIELD,
+    )
+
+
+def realized_pl_expression(exit_price):
+    """Per-unit realized P&L, signed by side like the live valuation."""
+    return Case(
+        When(trade_type=BuyAndSell.BUY, then=exit_price - F("entry_price")),
+        default=F("entry_price") - exit_price,
+        output_field=PRICE_FIELD,
+    )
+
+
+def apply_to_vaults(trade_ids, user_ids, now):
+    """
+    Books just-closed trades on their users' vaults: one settlement ledger
+    entry per trade, then one UPDATE adding the entries' sum to each
+    balance and dropping the open-trade counter by the trades closed.
+    The counter stops at 0: trades opened outside the API (admin, shell)
+    never raised it, and that drift is reconcile's to repair, not a reason
+    to fail the settlement.
+    """
+    record_settlements(trade_ids, now)
+    closed = (
+        BuyAndSell.objects.filter(id__in=trade_ids, user=OuterRef("user"))
+        .order_by()
+        .values("user")
+        .annotate(n=Count("id"))
+        .values("n")
+    )
+    Vault.objects.filter(user_id__in=user_ids).update(
+        balance=F("balance") + settlement_total(trade_ids),
+        open_trades_count=Greatest(F("open_trades_count") - Subquery(closed), 0),
+    )
+    for user_id in user_ids:
+        clear_trade_caches(user_id)
+
+
+def settle_trades(queryset, prices, reason, now=None):
+    """
+    Closes the open trades of ``queryset`` at ``prices[asset]`` in one
+    short transaction: the rows are locked (skipping rows another close
+    already holds), then a single UPDATE stamps status, exit price, realized
+    P&L, close time and ``reason`` (a value or an SQL expression), and the
+    P&L is booked on the vaults, their ledgers and the buckets for ``now``'s
+    date.
+
+    Returns the closed ``(id, user_id, asset)`` rows.
+    """
+    if not prices:
+        return []
+    now = now or timezone.now()
+
+    with transaction.atomic():
+        rows = list(
+            queryset.filter(trade_status=BuyAndSell.OPEN, asset_id__in=list(prices))
+            .select_for_update(skip_locked=True)
+            .order_by()
+            .values_list("id", "user_id", "asset_id")
+        )
+        if not rows:
+            return []
+
+        trade_ids = [r[0] for r in rows]
+        exit_price = exit_price_expression({symbol: prices[symbol] for symbol in {r[2] for r in rows}})
+        BuyAndSell.objects.filter(id__in=trade_ids).update(
+            trade_status=BuyAndSell.CLOSED,
+            exit_price=exit_price,
+            pl=realized_pl_expression(exit_price),
+            closed_at=now,
+            close_reason=reason,
+        )
+        record_realized_pl(trade_ids, timezone.localdate(now))
+        apply_to_vaults(trade_ids, {user_id for _, user_id, _ in rows}, now)
+
+    return rows
+
+
+def close_trade(trade_id, user_id, now=None):
+    """
+    Closes one of ``user_id``'s trades at the live price as a manual close.
+
+    The trade's symbol is looked up first, so only that one price is read
+    from the snapshot. The close itself is a conditional UPDATE
+    (``WHERE trade_status='open'``), so of two racing closes only one
+    matches. Returns False when the trade wasn't open (or isn't the
+    user's), which is how a double close is detected. A trade whose asset
+    has no price yet raises UnpricedTradeError and stays open, as in
+    ``settle_trades``.
+    """
+    now = now or timezone.now()
+    trade = BuyAndSell.objects.filter(id=trade_id, user_id=user_id, trade_status=BuyAndSell.OPEN)
+    symbol = trade.values_list("asset_id", flat=True).first()
+    if symbol is None:
+        return False
+    prices = get_price_snapshot([symbol])
+    if symbol not in prices:
+        raise UnpricedTradeError(symbol)
+    exit_price = exit_price_expression(prices)
+
+    with transaction.atomic():
+        closed = trade.update(
+            trade_status=BuyAndSell.CLOSED,
+            exit_price=exit_price,
+            pl=realized_pl_expression(exit_price),
+            closed_at=now,
+            close_reason=BuyAndSell.MANUAL,
+        )
+        if not closed:
+            return False
+        record_realized_pl([trade_id], timezone.localdate(now))
+        apply_to_vaults([trade_id], [user_id], now)
+
+    return True
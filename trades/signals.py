@@ -1,10 +1,14 @@
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from .models import Vault, BuyAndSell
+from .models import Vault, BuyAndSell, Asset
 from django_redis import get_redis_connection
 from django.core.cache import cache
-from .utils import clear_user_trade_cache
+from django.db import transaction
+from .utils import clear_trade_caches, clear_user_dashboard_cache
+from .prices import publish_prices, prices_changed
+from .realtime import broadcast_prices
+from .triggers import evaluate_triggers
 
 User = get_user_model()
 
@@ -17,8 +21,31 @@ def create_user_vault(sender, instance, created, **kwargs):
 
 @receiver(post_save, sender=BuyAndSell)
 def clear_trade_cache_on_save(sender, instance, **kwargs):
-    clear_user_trade_cache(instance.user.id)
+    clear_trade_caches(instance.user_id)
 
 @receiver(post_delete, sender=BuyAndSell)
 def clear_trade_cache_on_delete(sender, instance, **kwargs):
-    clear_user_trade_cache(instance.user.id)
\ No newline at end of file
+    clear_trade_caches(instance.user_id)
+
+
+@receiver(post_save, sender=Vault)
+def clear_dashboard_cache_on_vault_save(sender, instance, **kwargs):
+    clear_user_dashboard_cache(instance.user_id)
+
+
+@receiver(post_save, sender=Asset)
+def publish_price_on_asset_save(sender, instance, **kwargs):
+    # prices edited outside the updater (admin, seeding) reach the live hash too
+    if instance.current_price is not None:
+        quote = {instance.symbol: instance.current_price}
+        transaction.on_commit(lambda: publish_prices(quote))
+
+
+@receiver(prices_changed)
+def push_changed_prices(sender, changes, version, **kwargs):
+    broadcast_prices({symbol: change.price for symbol, change in changes.items()}, version)
+
+
+@receiver(prices_changed)
+def run_price_triggers(sender, changes, **kwargs):
+    evaluate_triggers({symbol: change.price for symbol, change in changes.items()})
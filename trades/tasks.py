@@ -2,16 +2,38 @@
 from celery import Celery
 from django.core.management import call_command
 from django.core.cache import cache
+from django.conf import settings
 from copiqat.celery import app  # Import from copiqat.celery
+from .utils import reconcile_open_trade_counts
+from .candles import rollup_all, prune_price_history
+from .expiry import expire_due_trades
+from .rollups import refresh_vault_pl
+from .ledger import checkpoint_balances
+from .providers import HTTP_PROVIDERS
+from .scheduling import max_run_seconds, run_budget
 
 
 
+def update_prices_lock_timeout():
+    """
+    Holds the lock for as long as one scheduled run can take. A run spends
+    at most one run's budget of credits, so a crashed worker blocks price
+    refreshes for a couple of minutes at worst.
+    """
+    provider = HTTP_PROVIDERS.get(settings.PRICE_PROVIDER)
+    if provider is None:
+        return 60
+    credits_per_minute = provider().credits_per_minute
+    budget = run_budget(credits_per_minute, settings.PRICE_REFRESH_RUN_SECONDS)
+    return max_run_seconds(budget, credits_per_minute)
+
+
 @app.task(max_retries=3, retry_backoff=True)
 def update_prices_task():
     lock_id = "update_prices_lock"
-    if cache.add(lock_id, "locked", timeout=60):
+    if cache.add(lock_id, "locked", timeout=update_prices_lock_timeout()):
         try:
-            call_command('update_asset_prices')
+            call_command('update_asset_prices', use_async=True, scheduled=True)
             print("Successfully ran update_asset_prices command")
         except Exception as e:
             print(f"Error running update_prices: {e}")
@@ -22,3 +44,65 @@ def update_prices_task():
         print("Task is already running, skipping...")
 
 
+@app.task
+def reconcile_counters_task():
+    fixed = reconcile_open_trade_counts()
+    print(f"Reconciled open trade counters, fixed {fixed} vault(s)")
+
+
+@app.task
+def rollup_candles_task():
+    lock_id = "rollup_candles_lock"
+    if cache.add(lock_id, "locked", timeout=5 * 60):
+        try:
+            written = rollup_all()
+            print(f"Rolled up price candles: {written}")
+        finally:
+            cache.delete(lock_id)
+    else:
+        print("Candle rollup is already running, skipping...")
+
+
+@app.task
+def prune_price_history_task():
+    deleted = prune_price_history()
+    print(f"Pruned price history: {deleted}")
+
+
+@app.task
+def expire_trades_task():
+    lock_id = "expire_trades_lock"
+    if cache.add(lock_id, "locked", timeout=5 * 60):
+        try:
+            closed = expire_due_trades()
+            print(f"Expired {closed} trade(s)")
+        finally:
+            cache.delete(lock_id)
+    else:
+        print("Trade expiry is already running, skipping...")
+
+
+@app.task
+def refresh_vault_pl_task():
+    lock_id = "refresh_vault_pl_lock"
+    if cache.add(lock_id, "locked", timeout=10 * 60):
+        try:
+            updated = refresh_vault_pl()
+            print(f"Refreshed P&L of {updated} vault(s)")
+        finally:
+            cache.delete(lock_id)
+    else:
+        print("Vault P&L refresh is already running, skipping...")
+
+
+@app.task
+def checkpoint_balances_task():
+    lock_id = "checkpoint_balances_lock"
+    if cache.add(lock_id, "locked", timeout=10 * 60):
+        try:
+            written = checkpoint_balances()
+            print(f"Wrote {written} balance checkpoint(s)")
+        finally:
+            cache.delete(lock_id)
+    else:
+        print("Balance checkpointing is already running, skipping...")
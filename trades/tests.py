@@ -1,3 +1,68 @@
-from django.test import TestCase
+from decimal import Decimal
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.test import TransactionTestCase, override_settings
+
+from accounts.middleware import JWTAuthMiddleware
+
+from .models import Asset, BuyAndSell
+from .prices import PriceChange, prices_changed
+from .routing import websocket_urlpatterns
+
+User = get_user_model()
+
+# what CHANNEL_LAYER_BACKEND=memory selects; with the local-memory cache
+# below the tests need no Redis server
+IN_MEMORY_CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS, CACHES=LOCMEM_CACHES)
+class PriceConsumerTests(TransactionTestCase):
+    # consumers reach the DB from worker threads, so test data must be committed
+    def setUp(self):
+        self.application = JWTAuthMiddleware(URLRouter(websocket_urlpatterns))
+        self.user = User.objects.create_user(
+            email="trader@example.com", password="secret", first_name="Tess", last_name="Trader"
+        )
+        Asset.objects.create(symbol="AAPL", name="Apple Inc.", asset_type="stock", current_price=Decimal("100"))
+        self.trade = BuyAndSell.objects.create(
+            user=self.user, asset_id="AAPL", trade_type=BuyAndSell.BUY, entry_price=Decimal("100"), duration="1h"
+        )
+        self.access_token = self.user.tokens()["access"]
+
+    def connect(self, token):
+        return WebsocketCommunicator(self.application, f"/ws/prices/?token={token}")
+
+    async def test_rejects_missing_or_invalid_token(self):
+        for token in ("", "not-a-jwt"):
+            communicator = self.connect(token)
+            connected, code = await communicator.connect()
+            self.assertFalse(connected)
+            self.assertEqual(code, 4401)
+
+    async def test_price_change_reaches_subscribed_socket(self):
+        communicator = self.connect(self.access_token)
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+
+        snapshot = await communicator.receive_json_from()
+        self.assertEqual(snapshot["type"], "snapshot")
+        self.assertEqual([trade["id"] for trade in snapshot["trades"]], [self.trade.id])
+
+        await sync_to_async(prices_changed.send)(
+            sender=Asset,
+            changes={"AAPL": PriceChange(Decimal("100"), Decimal("110"))},
+            version=7,
+        )
+        message = await communicator.receive_json_from()
+        self.assertEqual(message["type"], "price")
+        self.assertEqual(message["symbol"], "AAPL")
+        self.assertEqual(message["version"], 7)
+        self.assertEqual(message["trades"][0]["id"], self.trade.id)
+        self.assertEqual(Decimal(message["trades"][0]["pl"]), Decimal("10"))
+
+        await communicator.disconnect()
@@ -0,0 +1,70 @@
+"""
+Take-profit / stop-loss trigger engine.
+
+Runs after every committed price refresh, for the symbols that moved only.
+Each symbol costs one query of four range scans over the partial (asset,
+trade_type, take_profit|stop_loss) indexes on open trades. Evaluation thus
+reads the triggered trades and nothing else, however many trades are open.
+Only symbols with hits pay for locking and the settling UPDATE.
+
+A take profit or stop loss of 0 means "not set".
+"""
+
+import logging
+
+from django.db.models import Case, Q, Value, When
+
+from .models import BuyAndSell
+from .settlement import settle_trades
+
+logger = logging.getLogger(__name__)
+
+
+def take_profit_hit(price):
+    return Q(take_profit__gt=0) & (
+        Q(trade_type=BuyAndSell.BUY, take_profit__lte=price)
+        | Q(trade_type=BuyAndSell.SELL, take_profit__gte=price)
+    )
+
+
+def triggered_trades(symbol, price):
+    """
+    IDs of the open trades in ``symbol`` whose take profit or stop loss
+    ``price`` crossed, as a UNION ALL of one range scan per side and level.
+    Separate branches keep each one on its partial index; a single OR'd
+    predicate lets the planner misjudge side/level correlation and fall
+    back to scanning every open trade in the symbol.
+    """
+    open_trades = (
+        BuyAndSell.objects.filter(asset_id=symbol, trade_status=BuyAndSell.OPEN)
+        .order_by()
+        .values_list("id", flat=True)
+    )
+    buy, sell = open_trades.filter(trade_type=BuyAndSell.BUY), open_trades.filter(trade_type=BuyAndSell.SELL)
+    return buy.filter(take_profit__gt=0, take_profit__lte=price).union(
+        sell.filter(take_profit__gt=0, take_profit__gte=price),
+        buy.filter(stop_loss__gt=0, stop_loss__gte=price),
+        sell.filter(stop_loss__gt=0, stop_loss__lte=price),
+        all=True,
+    )
+
+
+def evaluate_triggers(prices):
+    """
+    Closes every trade triggered by ``{symbol: price}`` at that price and
+    returns how many were closed. A trade with both levels crossed (only
+    possible with inverted levels) closes as a take profit.
+    """
+    closed = 0
+    for symbol, price in prices.items():
+        reason = Case(
+            When(take_profit_hit(price), then=Value(BuyAndSell.TAKE_PROFIT)),
+            default=Value(BuyAndSell.STOP_LOSS),
+        )
+        trade_ids = set(triggered_trades(symbol, price))
+        if trade_ids:
+            trades = BuyAndSell.objects.filter(id__in=trade_ids)
+            closed += len(settle_trades(trades, {symbol: price}, reason))
+    if closed:
+        logger.info("TP/SL triggers closed %s trade(s) across %s symbol(s)", closed, len(prices))
+    return closed
@@ -9,7 +9,12 @@ from .views import (
     CreateTradeView,
     UserTradesView,
     CloseTradeView,
-    TraderListView
+    TraderListView,
+    TradeExportView,
+    CandleListView,
+    ExposureView,
+    BatchCreateTradeView,
+    BatchCloseTradeView,
 )
 
 urlpatterns = [
@@ -17,6 +22,11 @@ urlpatterns = [
     path('traders/', TraderListView.as_view(), name='trader-list'),
     path("list_trade", UserTradesView.as_view(), name="list-trades"),
     path("trades/<int:trade_id>/close/", CloseTradeView.as_view(), name="close-trade"),
+    path("trades/batch/", BatchCreateTradeView.as_view(), name="trade-batch-create"),
+    path("trades/batch/close/", BatchCloseTradeView.as_view(), name="trade-batch-close"),
+    path("trades/export/<str:file_format>/", TradeExportView.as_view(), name="export-trades"),
+    path("exposure/", ExposureView.as_view(), name="exposure"),
+    path("candles/", CandleListView.as_view(), name="price-candles"),
     # path("my-trades/", UserTradeListView.as_view(), name="trade-create"),
     path("vault/", VaultDetailView.as_view(), name="vault-detail"),
     path("deposit/", DepositCreateView.as_view(), name="deposit-create"),
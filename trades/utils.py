@@ -1,12 +1,101 @@
+import time
+
 from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import BuyAndSell, Vault
+from .realtime import notify_holdings_changed
+
+USER_TRADES_VERSION_KEY = "user_trades_version_{user_id}"
+USER_DASHBOARD_KEY = "user_dashboard_{user_id}"
+
+
+def get_user_trade_cache_version(user_id):
+    """
+    Returns the current cache generation for a user's trade lists.
+    """
+    key = USER_TRADES_VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so a lost/evicted counter never reuses an old generation
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def user_trade_cache_key(user_id, variant):
+    """
+    Builds the cache key for one trade-list variant (filters, cursor, ...)
+    of a user, tied to their current generation.
+    """
+    version = get_user_trade_cache_version(user_id)
+    return f"user_trades_{user_id}_v{version}_{variant}"
+
 
 def clear_user_trade_cache(user_id):
     """
-    Deletes both open and closed trade caches for a specific user.
+    Invalidates every cached trade-list variant for a specific user by
+    bumping their generation; stale entries simply expire.
+    """
+    key = USER_TRADES_VERSION_KEY.format(user_id=user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+def clear_user_dashboard_cache(user_id):
+    """
+    Drops a user's cached dashboard payload once the current transaction
+    commits, so a concurrent request can't re-cache the pre-commit state.
+    """
+    key = USER_DASHBOARD_KEY.format(user_id=user_id)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def clear_trade_caches(user_id):
+    """
+    Everything to do after a user's trades change: new trade-list
+    generation, fresh dashboard and a holdings refresh for open sockets.
+    """
+    # after commit, so a concurrent read can't re-cache the old rows
+    transaction.on_commit(lambda: clear_user_trade_cache(user_id))
+    clear_user_dashboard_cache(user_id)
+    transaction.on_commit(lambda: notify_holdings_changed(user_id))
+
+
+def adjust_open_trades_count(user_id, delta):
+    """
+    Atomically moves a user's open-trade counter by ``delta``.
+    """
+    Vault.objects.filter(user_id=user_id).update(
+        open_trades_count=F("open_trades_count") + delta
+    )
+    clear_user_dashboard_cache(user_id)
+
+
+def reconcile_open_trade_counts():
+    """
+    Repairs drifted open-trade counters with one set-based UPDATE and returns
+    how many vaults were fixed.
     """
-    cache_keys = [
-        f"user_trades_{user_id}_trade_status__iexact=open",
-        f"user_trades_{user_id}_trade_status__iexact=closed"
-    ]
-    for key in cache_keys:
-        cache.delete(key)
+    actual = Coalesce(
+        Subquery(
+            BuyAndSell.objects.filter(user=OuterRef("user"), trade_status="open")
+            .values("user")
+            .annotate(n=Count("id"))
+            .values("n")
+        ),
+        0,
+    )
+    drifted = list(
+        Vault.objects.annotate(actual=actual)
+        .exclude(open_trades_count=F("actual"))
+        .values_list("user_id", flat=True)
+    )
+    Vault.objects.filter(user_id__in=drifted).update(open_trades_count=actual)
+    for user_id in drifted:
+        clear_user_dashboard_cache(user_id)
+    return len(drifted)
@@ -1,17 +1,17 @@
 from rest_framework import generics, permissions
-from .models import BuyAndSell, Vault, Deposit, Asset
+from .models import BuyAndSell, Vault, Deposit, Asset, PriceCandle
+from django.db.models import Count, Sum
 from django.core.cache import cache
-from .serializers import TradeSerializer, VaultSerializer, DepositSerializer
+from .serializers import TradeSerializer, TradeIntentSerializer, VaultSerializer, DepositSerializer
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.generics import ListCreateAPIView
 from rest_framework import status
 from .serializers import DashboardSerializer
-from decimal import Decimal, InvalidOperation
+from decimal import Decimal
 from django.conf import settings
 from rest_framework import serializers
-from django.shortcuts import get_object_or_404
 from django.core.cache import cache
 from .filters import TradeFilter
 from django_redis import get_redis_connection
@@ -19,28 +19,98 @@ from rest_framework import generics, filters
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import Trader
 from .serializers import TraderSerializer
+from .prices import get_price_snapshot
+from .pnl import settled_price, value_trades
+from .pagination import TradeCursorPagination
+from .exports import EXPORT_FORMATS, export_queryset, iter_export
+from .candles import RESOLUTIONS, get_candles, parse_interval
+from .expiry import parse_duration
+from .rollups import VAULT_PL_VERSION_KEY
+from .settlement import UnpricedTradeError, close_trade, settle_trades
+from .utils import user_trade_cache_key, adjust_open_trades_count, clear_trade_caches, USER_DASHBOARD_KEY
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_datetime
+from django.utils import timezone
+from datetime import timezone as dt_timezone
+from django.http import StreamingHttpResponse
+from itertools import islice
+import hashlib
+import orjson
+import time
+
+
+# Dashboard payloads are invalidated by vault, trade and referral changes;
+# the TTL is just a memory bound.
+DASHBOARD_CACHE_TTL = 60 * 60  # seconds
 
 
-def clear_user_trade_cache(user_id):
+class DashboardView(APIView):
     """
-    Deletes both open and closed trade caches for a specific user.
+    Returns the user's dashboard. The DB-backed part is cached per user and
+    live P&L is applied on top; the ETag lets repeat polls get a 304
+    without rebuilding or re-serializing anything.
     """
-    cache_keys = [
-        f"user_trades_{user_id}_trade_status__iexact=open",
-        f"user_trades_{user_id}_trade_status__iexact=closed",
-    ]
-    for key in cache_keys:
-        cache.delete(key)
 
-
-class DashboardView(APIView):
     permission_classes = [IsAuthenticated]
     throttle_classes = []  # 🚫 disable throttling just for this view
 
     def get(self, request):
         user = request.user
+        cache_key = USER_DASHBOARD_KEY.format(user_id=user.id)
+
+        cached = cache.get_many([cache_key, VAULT_PL_VERSION_KEY])
+        entry, pl_version = cached.get(cache_key), cached.get(VAULT_PL_VERSION_KEY)
+        # 🔄 vault P&L rollups rewrite many vaults at once, so they bump one version
+        if entry is None or entry.get("pl_version") != pl_version:
+            entry = self.build_entry(user)
+            entry["pl_version"] = pl_version
+            cache.set(cache_key, entry, DASHBOARD_CACHE_TTL)
+
+        positions = entry["positions"]
+        prices = get_price_snapshot(set(positions["assets"]))
+        valuation = value_trades(
+            positions["entry_prices"],
+            positions["sides"],
+            [
+                prices.get(asset, entry_price)
+                for asset, entry_price in zip(
+                    positions["assets"], positions["entry_prices"]
+                )
+            ],
+        )
+        total_pl, total_pl_percent = valuation.total_pl, valuation.total_pl_percent
+
+        # ✅ The payload only changes with the cached entry or with live P&L
+        etag = '"%s"' % hashlib.md5(
+            f"{entry['version']}:{total_pl}:{total_pl_percent}".encode()
+        ).hexdigest()
+
+        # No Last-Modified: live P&L moves with every tick, so only the
+        # ETag (which hashes it) can tell whether the payload changed
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return self.with_validators(not_modified, etag)
+
+        data = dict(entry["data"])
+        data["unrealized_pl"] = total_pl
+        data["unrealized_pl_percent"] = total_pl_percent
+        return self.with_validators(Response(data), etag)
+
+    def build_entry(self, user):
         vault = getattr(user, "vault", None)
 
+        open_trades_count = vault.open_trades_count if vault else 0
+
+        # Positions are only loaded when there is something to value
+        open_trades = []
+        if open_trades_count:
+            open_trades = list(
+                BuyAndSell.objects.filter(user=user, trade_status="open").values_list(
+                    "asset", "trade_type", "entry_price"
+                )
+            )
+
         data = {
             "balance": vault.balance if vault else 0.00,
             "earning": vault.earning if vault else 0.00,
@@ -48,18 +118,48 @@ class DashboardView(APIView):
             "today": vault.today if vault else 0.00,
             "weekly_pl": vault.weekly_pl if vault else 0.00,
             "monthly_pl": vault.monthly_pl if vault else 0.00,
-            "active_trades_count": BuyAndSell.objects.filter(
-                user=user, trade_status="open"
-            ).count(),
+            "active_trades_count": open_trades_count,
+            "unrealized_pl": 0,  # filled in from live prices on every read
+            "unrealized_pl_percent": 0,
             "referral_count": user.referral_count,
             "referral_link": f"https://www.copiqat.trade/auth/signup?ref={user.referral_code}",
         }
 
         serializer = DashboardSerializer(data)  # ✅ correct usage
-        return Response(serializer.data)
+        return {
+            "data": dict(serializer.data),
+            "positions": {
+                "assets": [asset for asset, _, _ in open_trades],
+                "sides": [side for _, side, _ in open_trades],
+                "entry_prices": [str(entry_price) for _, _, entry_price in open_trades],
+            },
+            "version": time.time_ns(),
+        }
+
+    def with_validators(self, response, etag):
+        response["ETag"] = etag
+        # let clients keep the payload but always revalidate it
+        response["Cache-Control"] = "private, no-cache"
+        return response
 
 
-CACHE_TTL = 55  # seconds
+# Trade rows hold no prices, so they only go stale when a trade changes,
+# which bumps the user's cache generation. The TTL is just a memory bound.
+TRADE_ROWS_CACHE_TTL = 60 * 60 * 24  # seconds
+
+STREAM_CHUNK_SIZE = 2000  # rows fetched, valued and written per step
+
+TRADE_ROW_FIELDS = (
+    "id",
+    "asset",
+    "trade_type",
+    "trade_status",
+    "entry_price",
+    "exit_price",
+    "pl",
+    "duration",
+    "created_at",
+)
 
 
 class UserTradesView(APIView):
@@ -67,63 +167,300 @@ class UserTradesView(APIView):
 
     throttle_classes = []  # 🚫 disable throttling just for this view
     filterset_class = TradeFilter
+    pagination_class = TradeCursorPagination
 
     def get(self, request, *args, **kwargs):
         user_id = request.user.id
 
-        # ✅ Include query params in cache key to support filtering
+        # ✅ ?stream=1 returns the whole (filtered) history as a streamed array
+        if request.GET.get("stream") in ("1", "true"):
+            return self.stream_trades(request)
+
+        # ✅ Include query params in cache key to support filtering & cursors;
+        # the key carries the user's generation, so one bump invalidates all
         filter_param = request.GET.urlencode() or "all"
-        cache_key = f"user_trades_{user_id}_{filter_param}"
+        # "v2": rows carry the stored exit price and P&L of settled trades
+        cache_key = user_trade_cache_key(user_id, f"v2:{filter_param}")
 
-        # Check cache
-        cached_data = cache.get(cache_key)
-        if cached_data:
-            return Response(cached_data)
+        # Layer 1: price-independent trade rows, cached until a trade changes
+        page = cache.get(cache_key)
+        if page is None:
+            page = self.get_trade_rows(request)
+            cache.set(cache_key, page, TRADE_ROWS_CACHE_TTL)
 
-        trades = BuyAndSell.objects.filter(user=request.user).select_related()
+        # Layer 2: live prices applied at read time, so price ticks never
+        # invalidate the cached rows
+        return Response(
+            {"next": page["next"], "results": self.apply_live_pnl(page["rows"])}
+        )
+
+    def get_trade_rows(self, request):
+        trades = BuyAndSell.objects.filter(user=request.user)
 
         # ✅ Apply filtering
         filterset = TradeFilter(request.GET, queryset=trades)
-        trades = filterset.qs
-
-        trade_list = []
-        for trade in trades:
-            try:
-                asset_obj = Asset.objects.get(symbol=trade.asset)
-                current_price = asset_obj.current_price
-            except Asset.DoesNotExist:
-                current_price = trade.entry_price  # fallback if Asset missing
-
-            # Calculate PL
-            if trade.trade_type == BuyAndSell.BUY:
-                pl_value = current_price - trade.entry_price
-            else:  # SELL
-                pl_value = trade.entry_price - current_price
-
-            # Calculate PL%
-            try:
-                pl_percent = (pl_value / trade.entry_price) * 100
-            except (ZeroDivisionError, InvalidOperation):
-                pl_percent = Decimal("0.00")
-
-            trade_list.append(
+
+        # ✅ Keyset pagination: one (created_at, id) range scan per page
+        paginator = self.pagination_class()
+        trades = paginator.paginate_queryset(filterset.qs, request, view=self)
+
+        rows = [
+            {
+                "id": trade.id,
+                "asset": trade.asset_id,
+                "trade_type": trade.trade_type,
+                "trade_status": trade.trade_status,
+                "entry_price": str(trade.entry_price),
+                "exit_price": None if trade.exit_price is None else str(trade.exit_price),
+                "pl": str(trade.pl),
+                "duration": trade.duration,
+                "created_at": trade.created_at,
+            }
+            for trade in trades
+        ]
+        return {"next": paginator.get_next_link(), "rows": rows}
+
+    def stream_trades(self, request):
+        trades = BuyAndSell.objects.filter(user=request.user)
+        trades = TradeFilter(request.GET, queryset=trades).qs.order_by(
+            "-created_at", "-id"
+        )
+        response = StreamingHttpResponse(
+            self.iter_json(trades.values(*TRADE_ROW_FIELDS)),
+            content_type="application/json",
+        )
+        response["Cache-Control"] = "no-store"
+        return response
+
+    def iter_json(self, trade_values):
+        """
+        Yields a JSON array chunk by chunk. Rows come off a server-side cursor
+        and are valued per chunk, so memory stays flat however long the
+        history is.
+        """
+        rows = trade_values.iterator(chunk_size=STREAM_CHUNK_SIZE)
+        prices = {}
+        yield b"["
+        first = True
+        while chunk := list(islice(rows, STREAM_CHUNK_SIZE)):
+            for row in chunk:
+                row["entry_price"] = str(row["entry_price"])
+                row["pl"] = str(row["pl"])
+                if row["exit_price"] is not None:
+                    row["exit_price"] = str(row["exit_price"])
+            encoded = b",".join(
+                orjson.dumps(row, option=orjson.OPT_UTC_Z)
+                for row in self.apply_live_pnl(chunk, prices)
+            )
+            yield encoded if first else b"," + encoded
+            first = False
+        yield b"]"
+
+    def apply_live_pnl(self, rows, prices=None):
+        # ✅ Only open trades move with the market; settled ones are valued
+        # at their stored exit, so their P&L matches the vault and ledger
+        is_open = [row["trade_status"] == BuyAndSell.OPEN for row in rows]
+
+        # ✅ One snapshot lookup for every price this page needs; a shared
+        # ``prices`` dict only fetches symbols it hasn't seen yet
+        symbols = {row["asset"] for i, row in enumerate(rows) if is_open[i]}
+        if prices is None:
+            prices = get_price_snapshot(symbols)
+        elif missing := symbols - prices.keys():
+            prices.update(get_price_snapshot(missing))
+        current = [
+            prices.get(row["asset"], row["entry_price"])
+            if is_open[i]
+            else settled_price(row["trade_type"], row["entry_price"], row["pl"])
+            for i, row in enumerate(rows)
+        ]
+
+        # ✅ PL & PL% for the whole page in one vectorized pass
+        valuation = value_trades(
+            [row["entry_price"] for row in rows],
+            [row["trade_type"] for row in rows],
+            current,
+        )
+
+        return [
+            {
+                "id": row["id"],
+                "asset": row["asset"],
+                "trade_type": row["trade_type"],
+                "trade_status": row["trade_status"],
+                "entry_price": row["entry_price"],
+                "current_price": str(current[i]) if is_open[i] else row["exit_price"],
+                "pl": valuation.pl(i),
+                "pl_percent": valuation.pl_percent(i),
+                "duration": row["duration"],
+                "created_at": row["created_at"],
+            }
+            for i, row in enumerate(rows)
+        ]
+
+
+class ExposureView(APIView):
+    """
+    Open exposure per asset and side: trade count, notional at the live
+    price (and at entry) and unrealized P&L. The grouped rows come from one
+    GROUP BY, cached until the user's trades change; live prices are
+    applied on every read, like the trade list.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        cache_key = user_trade_cache_key(request.user.id, "exposure:groups")
+        groups = cache.get(cache_key)
+        if groups is None:
+            groups = list(
+                BuyAndSell.objects.filter(user=request.user, trade_status=BuyAndSell.OPEN)
+                .order_by()
+                .values("asset", "trade_type")
+                .annotate(open_trades=Count("id"), entry_notional=Sum("entry_price"))
+                .order_by("asset", "trade_type")
+            )
+            cache.set(cache_key, groups, TRADE_ROWS_CACHE_TTL)
+
+        prices = get_price_snapshot({group["asset"] for group in groups})
+        cent = Decimal("0.01")
+        positions = []
+        total_pl = Decimal("0")
+        for group in groups:
+            # ✅ unpriced assets are valued at entry, like the trade list
+            entry_notional = group["entry_notional"]
+            price = prices.get(group["asset"])
+            notional = entry_notional if price is None else price * group["open_trades"]
+            pl = notional - entry_notional
+            if group["trade_type"] == BuyAndSell.SELL:
+                pl = -pl
+            total_pl += pl
+            positions.append(
                 {
-                    "id": trade.id,
-                    "asset": trade.asset,
-                    "trade_type": trade.trade_type,
-                    "trade_status": trade.trade_status,
-                    "entry_price": str(trade.entry_price),
-                    "current_price": str(current_price),
-                    "pl": str(round(pl_value, 2)),
-                    "pl_percent": str(round(pl_percent, 2)),
-                    "duration": trade.duration,
-                    "created_at": trade.created_at,
+                    "asset": group["asset"],
+                    "trade_type": group["trade_type"],
+                    "open_trades": group["open_trades"],
+                    "current_price": None if price is None else str(price),
+                    "entry_notional": str(entry_notional.quantize(cent)),
+                    "notional": str(notional.quantize(cent)),
+                    "unrealized_pl": str(pl.quantize(cent)),
                 }
             )
 
-        # Cache per user+filter combo
-        cache.set(cache_key, trade_list, CACHE_TTL)
-        return Response(trade_list)
+        return Response({"positions": positions, "unrealized_pl": str(total_pl.quantize(cent))})
+
+
+class TradeExportView(APIView):
+    """
+    Streams a trade history export as CSV, Arrow IPC or Parquet.
+    Staff can pass ``?all=1`` to export every user's trades.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, file_format):
+        if file_format not in EXPORT_FORMATS:
+            return Response(
+                {"detail": f"Unsupported export format. Use one of: {', '.join(EXPORT_FORMATS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        export_all = request.GET.get("all") in ("1", "true")
+        if export_all and not request.user.is_staff:
+            return Response(
+                {"detail": "Only staff can export all users' trades."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        queryset = export_queryset(None if export_all else request.user)
+        content_type, extension = EXPORT_FORMATS[file_format]
+        response = StreamingHttpResponse(
+            iter_export(queryset, file_format), content_type=content_type
+        )
+        response["Content-Disposition"] = f'attachment; filename="trades.{extension}"'
+        response["Cache-Control"] = "no-store"
+        return response
+
+
+# Bigger ranges have to ask for a coarser interval
+MAX_CANDLES = 5000
+
+
+class CandleListView(APIView):
+    """
+    OHLC price history for one symbol:
+    ``?symbol=BTC/USD&start=<iso>&end=<iso>&interval=4h``.
+
+    ``end`` defaults to now. ``interval`` is ``<n>m``, ``<n>h`` or ``<n>d``;
+    without it the finest stored resolution that fits the range in
+    MAX_CANDLES is used. Reads always come from the coarsest stored
+    resolution that tiles the interval.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        symbol = request.GET.get("symbol", "").strip().upper()
+        if not symbol or not Asset.objects.filter(symbol=symbol).exists():
+            return Response({"detail": "Unknown symbol."}, status=status.HTTP_404_NOT_FOUND)
+
+        start = self.parse_time(request.GET.get("start"))
+        end = self.parse_time(request.GET.get("end")) if request.GET.get("end") else timezone.now()
+        if start is None or end is None or start >= end:
+            return Response(
+                {"detail": "Pass ISO 8601 'start' and 'end' values with start before end."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if request.GET.get("interval"):
+            interval = parse_interval(request.GET["interval"])
+            if interval is None:
+                return Response(
+                    {"detail": "Invalid interval. Use e.g. 1m, 15m, 4h or 1d."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+        else:
+            # finest resolution that still fits, daily as the last resort
+            interval = next(
+                (step for step in RESOLUTIONS.values() if (end - start) / step <= MAX_CANDLES),
+                RESOLUTIONS[PriceCandle.DAY],
+            )
+
+        if (end - start) / interval > MAX_CANDLES:
+            return Response(
+                {"detail": f"Range spans more than {MAX_CANDLES} candles, use a coarser interval."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        resolution, candles = get_candles(symbol, start, end, interval)
+        return Response(
+            {
+                "symbol": symbol,
+                "interval": int(interval.total_seconds()),
+                "resolution": resolution,
+                "candles": [
+                    {
+                        "time": bucket,
+                        "open": str(open_),
+                        "high": str(high),
+                        "low": str(low),
+                        "close": str(close),
+                        "ticks": count,
+                    }
+                    for _, bucket, open_, high, low, close, count in candles
+                ],
+            }
+        )
+
+    @staticmethod
+    def parse_time(value):
+        try:
+            parsed = parse_datetime(value or "")
+        except ValueError:
+            return None
+        if parsed is not None and timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed, dt_timezone.utc)
+        return parsed
 
 
 class CreateTradeView(APIView):
@@ -133,47 +470,212 @@ class CreateTradeView(APIView):
         serializer = TradeSerializer(data=request.data, context={"request": request})
         serializer.is_valid(raise_exception=True)
 
-        asset_symbol = serializer.validated_data["asset"]
+        # Asset already resolved (and 400'd if unknown) by the serializer
+        asset_obj = serializer.validated_data["asset"]
         trade_type = serializer.validated_data["trade_type"]
         duration = serializer.validated_data["duration"]
 
-        # Get asset from DB
-        asset_obj = get_object_or_404(Asset, symbol=asset_symbol)
-
-        # Create trade with entry_price = current_price at the time
-        trade = BuyAndSell.objects.create(
-            user=request.user,
-            asset=asset_symbol,
-            trade_type=trade_type,
-            duration=duration,
-            entry_price=asset_obj.current_price,
-        )
+        # Create trade with entry_price = the live price at the time
+        prices = get_price_snapshot([asset_obj.symbol])
+        prices.setdefault(asset_obj.symbol, asset_obj.current_price)
+        with transaction.atomic():
+            trade = BuyAndSell.objects.create(
+                user=request.user,
+                asset=asset_obj,
+                trade_type=trade_type,
+                duration=duration,
+                entry_price=prices[asset_obj.symbol],
+                take_profit=serializer.validated_data.get("take_profit", 0),
+                stop_loss=serializer.validated_data.get("stop_loss", 0),
+                expires_at=timezone.now() + parse_duration(duration),
+            )
+            adjust_open_trades_count(request.user.id, +1)
 
         return Response(
-            TradeSerializer(trade, context={"request": request}).data,
+            TradeSerializer(trade, context={"request": request, "prices": prices}).data,
             status=status.HTTP_201_CREATED,
         )
 
 
 class CloseTradeView(APIView):
     def post(self, request, trade_id):
-        # Get trade belonging to the user
-        trade = get_object_or_404(BuyAndSell, id=trade_id, user=request.user)
+        # ✅ One conditional UPDATE; a trade that isn't open (already closed,
+        # or not this user's) simply matches no row
+        try:
+            closed = close_trade(trade_id, request.user.id)
+        except UnpricedTradeError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_409_CONFLICT)
+        if not closed:
+            return Response(
+                {"detail": "Trade not found or already closed."},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        return Response(
+            {"detail": "Trade closed successfully."}, status=status.HTTP_200_OK
+        )
+
+
+# Largest batch a copy-trading/rebalancing client can send at once
+BATCH_MAX_TRADES = 100
 
-        if trade.trade_status == "closed":
+
+class BatchCreateTradeView(APIView):
+    """
+    Opens many trades at once. Every intent is checked against one set of
+    the user's open trades, one asset lookup and one price snapshot, then
+    the valid ones are inserted with a single bulk_create. Results come
+    back per item, in request order.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        intents = request.data.get("trades")
+        if not isinstance(intents, list) or not 0 < len(intents) <= BATCH_MAX_TRADES:
             return Response(
-                {"detail": "Trade already closed."}, status=status.HTTP_400_BAD_REQUEST
+                {"detail": f"Send a 'trades' list of 1 to {BATCH_MAX_TRADES} trades."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if not hasattr(request.user, "vault"):
+            return Response(
+                {"detail": "Vault not found. Please contact support."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        results, valid = [None] * len(intents), []
+        for index, intent in enumerate(intents):
+            serializer = TradeIntentSerializer(data=intent)
+            if serializer.is_valid():
+                valid.append((index, serializer.validated_data))
+            else:
+                results[index] = {"index": index, "status": "error", "errors": serializer.errors}
+
+        # ✅ One query each for assets and open trades, one snapshot for prices
+        symbols = {data["asset"] for _, data in valid}
+        assets = Asset.objects.in_bulk(symbols, field_name="symbol")
+        taken = set(
+            BuyAndSell.objects.filter(
+                user=request.user, trade_status=BuyAndSell.OPEN, asset_id__in=symbols
+            ).values_list("asset_id", "trade_type")
+        )
+        prices = get_price_snapshot(symbols)
+        now = timezone.now()
+
+        trades, created_at = [], []
+        for index, data in valid:
+            symbol, trade_type = data["asset"], data["trade_type"]
+            asset = assets.get(symbol)
+            if asset is not None and prices.get(symbol) is None:
+                prices[symbol] = asset.current_price
+            if asset is None:
+                error = f"Unknown asset {symbol}."
+            elif prices[symbol] is None:
+                error = f"No live price for {symbol} yet."
+            elif (symbol, trade_type) in taken:
+                error = f"You already have an open {trade_type.upper()} trade for {symbol.upper()}."
+            else:
+                error = None
+            if error:
+                results[index] = {"index": index, "status": "error", "errors": {"non_field_errors": [error]}}
+                continue
+
+            taken.add((symbol, trade_type))  # duplicates within the batch too
+            trades.append(
+                BuyAndSell(
+                    user=request.user,
+                    asset=asset,
+                    trade_type=trade_type,
+                    duration=data["duration"],
+                    entry_price=prices[symbol],
+                    take_profit=data.get("take_profit", 0),
+                    stop_loss=data.get("stop_loss", 0),
+                    expires_at=now + parse_duration(data["duration"]),
+                )
             )
+            created_at.append(index)
 
-        # Update status to closed
-        trade.trade_status = "closed"
-        trade.save()
+        if trades:
+            with transaction.atomic():
+                BuyAndSell.objects.bulk_create(trades)
+                adjust_open_trades_count(request.user.id, +len(trades))
+                clear_trade_caches(request.user.id)  # bulk_create sends no post_save
 
-        # Invalidate cache
-        # clear_user_trade_cache(request.user.id)
+            rows = TradeSerializer(trades, many=True, context={"request": request, "prices": prices}).data
+            for index, row in zip(created_at, rows):
+                results[index] = {"index": index, "status": "created", "trade": row}
 
         return Response(
-            {"detail": "Trade closed successfully."}, status=status.HTTP_200_OK
+            {"created": len(trades), "results": results},
+            status=status.HTTP_201_CREATED if trades else status.HTTP_400_BAD_REQUEST,
+        )
+
+
+class BatchCloseTradeView(APIView):
+    """
+    Closes many of the user's trades at once: one read of the open trades
+    asked for, one price snapshot, then one set-based settlement in a
+    single transaction. Results come back per trade id, in request order.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        trade_ids = request.data.get("trade_ids")
+        if (
+            not isinstance(trade_ids, list)
+            or not 0 < len(trade_ids) <= BATCH_MAX_TRADES
+            # bool is an int subclass; True/False must not pass as ids 1/0
+            or not all(
+                isinstance(trade_id, int) and not isinstance(trade_id, bool) for trade_id in trade_ids
+            )
+        ):
+            return Response(
+                {"detail": f"Send a 'trade_ids' list of 1 to {BATCH_MAX_TRADES} trade ids."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        open_trades = dict(
+            BuyAndSell.objects.filter(
+                user=request.user, trade_status=BuyAndSell.OPEN, id__in=trade_ids
+            ).values_list("id", "asset_id")
+        )
+        prices = get_price_snapshot(set(open_trades.values()))
+
+        closed = {}
+        if prices:
+            rows = settle_trades(
+                BuyAndSell.objects.filter(user=request.user, id__in=list(open_trades)),
+                prices,
+                BuyAndSell.MANUAL,
+            )
+            closed = {
+                trade_id: (exit_price, pl)
+                for trade_id, exit_price, pl in BuyAndSell.objects.filter(
+                    id__in=[row[0] for row in rows]
+                ).values_list("id", "exit_price", "pl")
+            }
+
+        results = []
+        for trade_id in trade_ids:
+            if trade_id in closed:
+                exit_price, pl = closed[trade_id]
+                results.append(
+                    {"id": trade_id, "status": "closed", "exit_price": str(exit_price), "pl": str(pl)}
+                )
+            elif trade_id in open_trades and open_trades[trade_id] not in prices:
+                results.append(
+                    {"id": trade_id, "status": "error", "detail": f"No live price for {open_trades[trade_id]} yet."}
+                )
+            else:
+                # not the user's, already closed, or closed concurrently
+                results.append(
+                    {"id": trade_id, "status": "error", "detail": "Trade not found or already closed."}
+                )
+
+        return Response(
+            {"closed": len(closed), "results": results},
+            status=status.HTTP_200_OK if closed else status.HTTP_409_CONFLICT,
         )
 
 